@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,12 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def project_test_settings(settings):
+    # Те же настройки, что TEST_RUNNER включает для manage.py test
+    from core.testing import TEST_SETTINGS
+
+    for name, value in TEST_SETTINGS.items():
+        setattr(settings, name, value)
@@ -0,0 +1,9 @@
+from posts.notifications import unread_count
+
+
+def notifications(request):
+    """Число непрочитанных уведомлений, считается только при выводе."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': lambda: unread_count(user)}
@@ -0,0 +1,40 @@
+"""Загрузчики шаблонов, убирающие отступы из исходника.
+
+Сжатие делается один раз при чтении шаблона, а не на каждый ответ:
+вместе с ``django.template.loaders.cached.Loader`` скомпилированный
+шаблон уже не содержит отступов. Переводы строк сохраняются, поэтому
+пробел между строчными элементами не пропадает. Содержимое ``<pre>``,
+``<textarea>`` и ``<script>`` не трогается.
+"""
+import re
+
+from django.template.loaders import app_directories, filesystem
+
+PRESERVE_RE = re.compile(
+    r'(<(pre|textarea|script)\b.*?</\2>)', re.IGNORECASE | re.DOTALL)
+INDENT_RE = re.compile(r'\n[ \t\r\n]*')
+TRAILING_RE = re.compile(r'[ \t]+\n')
+
+
+def compact_whitespace(source):
+    """Убирает отступы, хвостовые пробелы и пустые строки."""
+    parts = PRESERVE_RE.split(source)
+    # split с двумя группами: текст, блок, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        text = TRAILING_RE.sub('\n', parts[index])
+        parts[index] = INDENT_RE.sub('\n', text)
+    del parts[2::3]
+    return ''.join(parts)
+
+
+class CompactLoaderMixin:
+    def get_contents(self, origin):
+        return compact_whitespace(super().get_contents(origin))
+
+
+class FilesystemLoader(CompactLoaderMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(CompactLoaderMixin, app_directories.Loader):
+    pass
@@ -0,0 +1,363 @@
+"""Нагрузочный тест смешанным трафиком чтения и записи.
+
+Приложение ``yatube.wsgi`` вызывается либо прямо в процессе, либо через
+локальный HTTP-сервер. Нагрузку создают несколько процессов по несколько
+потоков; каждый поток входит под своим пользователем и выбирает
+сценарии случайно по весам. Результаты собираются по секундам.
+
+Ответ, упавший на блокировке SQLite, приложение из
+``loadtest_application`` помечает заголовком ``X-Database-Locked``
+(core.middleware.DatabaseLockMiddleware): текст ошибки есть только на
+отладочной странице 500, а не в ``core/500.html``. На обычном сайте этого
+middleware нет.
+"""
+import http.client
+import io
+import random
+import socketserver
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.test.utils import override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .middleware import LOCKED_HEADER
+
+LOCK_MIDDLEWARE = 'core.middleware.DatabaseLockMiddleware'
+
+DEFAULT_MIX = {
+    'index': 30,
+    'group': 15,
+    'profile': 15,
+    'follow_index': 15,
+    'add_comment': 10,
+    'post_create': 5,
+    'profile_follow': 10,
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), (70, 130, 180)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines += [
+            f'--{boundary}'.encode(),
+            f'Content-Disposition: form-data; name="{name}"'.encode(),
+            b'',
+            str(value).encode(),
+        ]
+    for name, (filename, content) in files.items():
+        lines += [
+            f'--{boundary}'.encode(),
+            (f'Content-Disposition: form-data; name="{name}"; '
+             f'filename="{filename}"').encode(),
+            b'Content-Type: image/png',
+            b'',
+            content,
+        ]
+    lines += [f'--{boundary}--'.encode(), b'']
+    return b'\r\n'.join(lines), f'multipart/form-data; boundary={boundary}'
+
+
+class Session:
+    """Cookie и CSRF-токен поверх транспорта."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.cookies = {}
+
+    def request(self, method, path, data=None, files=None):
+        headers = {}
+        body = b''
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items())
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+            if files:
+                body, headers['Content-Type'] = multipart(data or {}, files)
+            else:
+                body = urlencode(data or {}).encode()
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        status, response_headers = self.transport.request(
+            method, path, headers, body)
+        for name, value in response_headers:
+            if name.lower() != 'set-cookie':
+                continue
+            cookie = SimpleCookie()
+            cookie.load(value)
+            for name, morsel in cookie.items():
+                self.cookies[name] = morsel.value
+        return status, {
+            name.lower(): value for name, value in response_headers}
+
+    def login(self, username, password):
+        self.request('GET', reverse('users:login'))
+        status, _ = self.request(
+            'POST', reverse('users:login'),
+            {'username': username, 'password': password},
+        )
+        return status == 302
+
+
+class InProcessTransport:
+    """Вызывает WSGI-приложение напрямую, без сокета."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def request(self, method, path, headers, body):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': '127.0.0.1',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': '127.0.0.1',
+            # Адрес вне INTERNAL_IPS, чтобы не включался debug toolbar
+            'REMOTE_ADDR': '192.0.2.1',
+            'CONTENT_LENGTH': str(len(body)),
+            'CONTENT_TYPE': headers.pop('Content-Type', ''),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers.items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            started['status'] = int(status.split()[0])
+            started['headers'] = response_headers
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers']
+
+
+class SocketTransport:
+    """Ходит в локальный HTTP-сервер, одно соединение на поток."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30)
+        return self.local.connection
+
+    def request(self, method, path, headers, body):
+        connection = self.connection()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (ConnectionError, http.client.HTTPException):
+            self.local.connection = None
+            raise
+        return response.status, response.getheaders()
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def get_environ(self):
+        environ = super().get_environ()
+        # Адрес вне INTERNAL_IPS, чтобы не включался debug toolbar
+        environ['REMOTE_ADDR'] = '192.0.2.1'
+        return environ
+
+    def log_message(self, *args):
+        pass
+
+
+def loadtest_application():
+    """WSGI-приложение сайта с пометкой блокировок базы первым слоем."""
+    with override_settings(MIDDLEWARE=[LOCK_MIDDLEWARE, *settings.MIDDLEWARE]):
+        # Цепочка middleware собирается здесь и дальше настроек не читает
+        return WSGIHandler()
+
+
+def serve_in_background(application, host='127.0.0.1', port=0):
+    """Поднимает многопоточный WSGI-сервер и возвращает его."""
+    server = make_server(
+        host, port, application,
+        server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Scenarios:
+    """Сценарии трафика; каждый возвращает (status, заголовки ответа).
+
+    Чтение ленты, групп и профилей идет анонимно, остальное под входом.
+    """
+
+    def __init__(self, anonymous, session, targets, image):
+        self.anonymous = anonymous
+        self.session = session
+        self.targets = targets
+        self.image = image
+
+    def index(self):
+        return self.anonymous.request(
+            'GET', f"{reverse('posts:index')}?page={random.randint(1, 5)}")
+
+    def group(self):
+        slug = random.choice(self.targets['groups'])
+        return self.anonymous.request(
+            'GET', reverse('posts:group_list', args=[slug]))
+
+    def profile(self):
+        username = random.choice(self.targets['usernames'])
+        return self.anonymous.request(
+            'GET', reverse('posts:profile', args=[username]))
+
+    def follow_index(self):
+        return self.session.request('GET', reverse('posts:follow_index'))
+
+    def add_comment(self):
+        post_id = random.choice(self.targets['posts'])
+        return self.session.request(
+            'POST', reverse('posts:add_comment', args=[post_id]),
+            {'text': 'Нагрузочный комментарий'},
+        )
+
+    def post_create(self):
+        return self.session.request(
+            'POST', reverse('posts:post_create'),
+            {'text': 'Нагрузочный пост'},
+            {'image': ('load.png', self.image)},
+        )
+
+    def profile_follow(self):
+        username = random.choice(self.targets['usernames'])
+        return self.session.request(
+            'GET', reverse('posts:profile_follow', args=[username]))
+
+
+def run_thread(transport, credentials, targets, mix, deadline, samples):
+    session = Session(transport)
+    if not session.login(*credentials):
+        samples.append((time.time(), 'login', 0.0, 'error'))
+        return
+    scenarios = Scenarios(Session(transport), session, targets, png_bytes())
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.time() < deadline:
+        name = random.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            status, headers = getattr(scenarios, name)()
+        except Exception:
+            outcome = 'error'
+        else:
+            if status >= 500:
+                outcome = (
+                    'lock' if LOCKED_HEADER.lower() in headers else 'error')
+            else:
+                outcome = 'ok'
+        samples.append(
+            (time.time(), name, time.perf_counter() - started, outcome))
+
+
+def run_process(mode, address, credentials, targets, mix, duration, threads):
+    """Тело рабочего процесса; возвращает список замеров."""
+    from django.db import connections
+
+    connections.close_all()
+    if mode == 'socket':
+        transport = SocketTransport(*address)
+    else:
+        transport = InProcessTransport(loadtest_application())
+    deadline = time.time() + duration
+    samples = []
+    workers = [
+        threading.Thread(
+            target=run_thread,
+            args=(transport, credentials[index % len(credentials)], targets,
+                  mix, deadline, samples),
+        )
+        for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    connections.close_all()
+    return samples
+
+
+def summarize(samples):
+    """Строки отчета: по секундам и по сценариям."""
+    if not samples:
+        return [], []
+    start = min(sample[0] for sample in samples)
+    buckets = defaultdict(list)
+    scenarios = defaultdict(list)
+    for timestamp, name, latency, outcome in samples:
+        buckets[int(timestamp - start)].append((latency, outcome))
+        scenarios[name].append((latency, outcome))
+
+    def row(label, items, seconds=1):
+        latencies = [latency * 1000 for latency, _ in items]
+        outcomes = [outcome for _, outcome in items]
+        return {
+            'label': label,
+            'requests': len(items),
+            'rps': len(items) / seconds,
+            'p50': percentile(latencies, 0.5),
+            'p90': percentile(latencies, 0.9),
+            'p99': percentile(latencies, 0.99),
+            'errors': outcomes.count('error') / len(items),
+            'locks': outcomes.count('lock') / len(items),
+        }
+
+    duration = max(1, max(buckets) + 1)
+    by_second = [row(f'{second}s', buckets[second])
+                 for second in sorted(buckets)]
+    by_scenario = [row(name, items, duration)
+                   for name, items in sorted(scenarios.items())]
+    by_scenario.append(row('total', [
+        (latency, outcome) for _, _, latency, outcome in samples
+    ], duration))
+    return by_second, by_scenario
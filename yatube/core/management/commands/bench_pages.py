@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from core.middleware import brotli
+from posts.models import Group, Post, User
+
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+class Command(BaseCommand):
+    help = (
+        'Размер ответа и процессорное время на запрос для основных '
+        'страниц без сжатия, с gzip и br.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*',
+                            help='адреса страниц, по умолчанию основные')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def default_urls(self):
+        urls = [reverse('posts:index'), reverse('about:tech')]
+        group = Group.objects.first()
+        if group is not None:
+            urls.append(reverse('posts:group_list', args=[group.slug]))
+        user = User.objects.filter(posts__isnull=False).first()
+        if user is not None:
+            urls.append(reverse('posts:profile', args=[user.username]))
+        post = Post.objects.first()
+        if post is not None:
+            urls.append(reverse('posts:post_detail', args=[post.pk]))
+        return urls
+
+    def measure(self, client, url, encoding, repeat):
+        size = 0
+        started = time.process_time()
+        for _ in range(repeat):
+            response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+        cpu_ms = (time.process_time() - started) * 1000 / repeat
+        return size, cpu_ms
+
+    def handle(self, *args, **options):
+        # Адрес вне INTERNAL_IPS, чтобы не мерить debug toolbar
+        client = Client(REMOTE_ADDR='192.0.2.1')
+        encodings = [e for e in ENCODINGS if e != 'br' or brotli is not None]
+        header = f'{"URL":40}' + ''.join(
+            f'{e + " B":>12}{e + " ms":>12}' for e in encodings)
+        self.stdout.write(header)
+        for url in options['urls'] or self.default_urls():
+            row = f'{url:40}'
+            for encoding in encodings:
+                size, cpu_ms = self.measure(
+                    client, url, encoding, options['repeat'])
+                row += f'{size:>12}{cpu_ms:>12.2f}'
+            self.stdout.write(row)
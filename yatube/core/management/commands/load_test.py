@@ -0,0 +1,120 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.loadtest import (DEFAULT_MIX, loadtest_application, run_process,
+                           serve_in_background, summarize)
+from posts.models import Group, Post, User
+
+LOAD_USER_PREFIX = 'loadtest-'
+TARGETS_LIMIT = 200
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX or not weight.isdigit():
+            raise CommandError(
+                f'Неверный элемент смеси {item!r}; сценарии: '
+                + ', '.join(DEFAULT_MIX))
+        mix[name] = int(weight)
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест смешанным трафиком: пропускная способность, '
+        'перцентили задержки и доля ошибок и блокировок базы по секундам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=('inprocess', 'socket'),
+                            default='inprocess')
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10,
+                            help='секунд на процесс')
+        parser.add_argument('--users', type=int, default=8,
+                            help='сколько нагрузочных пользователей завести')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                            help='веса сценариев: index=30,add_comment=10')
+
+    def prepare(self, users, password):
+        credentials = []
+        for number in range(users):
+            username = f'{LOAD_USER_PREFIX}{number}'
+            user, created = User.objects.get_or_create(username=username)
+            if created or not user.check_password(password):
+                user.set_password(password)
+                user.save()
+            credentials.append((username, password))
+        author = User.objects.get(username=credentials[0][0])
+        if not Group.objects.exists():
+            Group.objects.create(
+                title='Нагрузка', slug='loadtest', description='Нагрузка')
+        if not Post.objects.exists():
+            Post.objects.create(
+                author=author, text='Нагрузочный пост',
+                group=Group.objects.first(),
+            )
+        return credentials
+
+    def targets(self):
+        return {
+            'groups': list(Group.objects.values_list(
+                'slug', flat=True)[:TARGETS_LIMIT]),
+            'usernames': list(User.objects.filter(
+                posts__isnull=False).distinct().values_list(
+                'username', flat=True)[:TARGETS_LIMIT]),
+            'posts': list(Post.objects.values_list(
+                'pk', flat=True)[:TARGETS_LIMIT]),
+        }
+
+    def write_table(self, title, rows):
+        self.stdout.write(title)
+        self.stdout.write(
+            f'{"":16}{"req":>8}{"rps":>9}{"p50 ms":>9}{"p90 ms":>9}'
+            f'{"p99 ms":>9}{"errors":>9}{"locks":>9}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["label"]:16}{row["requests"]:>8}{row["rps"]:>9.1f}'
+                f'{row["p50"]:>9.1f}{row["p90"]:>9.1f}{row["p99"]:>9.1f}'
+                f'{row["errors"]:>9.1%}{row["locks"]:>9.1%}'
+            )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        credentials = self.prepare(options['users'], options['password'])
+        targets = self.targets()
+        server = None
+        address = None
+        if options['mode'] == 'socket':
+            server = serve_in_background(loadtest_application())
+            address = server.server_address[:2]
+        # Дочерние процессы не должны делить соединение с родителем
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        try:
+            with context.Pool(options['processes']) as pool:
+                results = pool.starmap(run_process, [
+                    (options['mode'], address,
+                     credentials[number::options['processes']]
+                     or credentials,
+                     targets, options['mix'], options['duration'],
+                     options['threads'])
+                    for number in range(options['processes'])
+                ])
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        samples = [sample for result in results for sample in result]
+        by_second, by_scenario = summarize(samples)
+        self.write_table('По секундам', by_second)
+        self.stdout.write('')
+        self.write_table('По сценариям', by_scenario)
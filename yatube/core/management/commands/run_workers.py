@@ -0,0 +1,66 @@
+import multiprocessing
+import signal
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+from core.taskqueue import purge_finished, work, worker_name
+
+
+def run_threads(threads, stop, poll, burst):
+    workers = [
+        threading.Thread(
+            target=work, args=(worker_name(number), stop, poll, burst))
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле процессов и потоков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='пауза в секундах, когда очередь пуста')
+        parser.add_argument('--burst', action='store_true',
+                            help='выйти, когда готовых задач не осталось')
+        parser.add_argument('--keep-days', type=int, default=7,
+                            help='сколько дней хранить выполненные задачи')
+
+    def handle(self, *args, **options):
+        # Задачи регистрируются при импорте модулей tasks приложений
+        autodiscover_modules('tasks')
+        purged = purge_finished(timedelta(days=options['keep_days']))
+        if purged:
+            self.stdout.write(f'Удалено выполненных задач: {purged}')
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+        worker_args = (
+            options['threads'], stop, options['poll'], options['burst'])
+        if options['processes'] <= 1:
+            run_threads(*worker_args)
+            return
+        # Дочерние процессы не должны делить соединение с родителем
+        connections.close_all()
+        processes = [
+            context.Process(target=run_threads, args=worker_args)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
@@ -0,0 +1,158 @@
+import sys
+import zlib
+
+from django.core.signals import got_request_exception
+from django.db import OperationalError
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_LENGTH = 200
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+LOCKED_HEADER = 'X-Database-Locked'
+# Картинки, видео и архивы уже сжаты, второй проход только тратит CPU
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+COMPRESSIBLE_SUFFIXES = ('+xml', '+json')
+
+
+def is_compressible(content_type):
+    mime_type = content_type.partition(';')[0].strip().lower()
+    return (
+        mime_type.startswith(COMPRESSIBLE_TYPES)
+        or mime_type.endswith(COMPRESSIBLE_SUFFIXES)
+    )
+
+
+def accepted_encodings(accept_encoding):
+    """Кодировки из Accept-Encoding, которые клиент принимает (q > 0)."""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def accepted_encoding(accept_encoding):
+    """Лучшее из br/gzip, которое клиент принимает (q > 0)."""
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def gzip_compressor():
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def compress_bytes(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    compressor = gzip_compressor()
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток, сбрасывая буфер после каждого куска."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = gzip_compressor()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответ в br или gzip по Accept-Encoding.
+
+    В отличие от GZipMiddleware потоковые ответы сжимаются со сбросом
+    буфера после каждого куска, поэтому клиент получает данные сразу,
+    а не когда накопится блок zlib. Уже сжатые типы, как картинки из
+    MEDIA, отдаются как есть вместе с Content-Length.
+    """
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < MIN_COMPRESS_LENGTH
+        ):
+            return response
+        if response.has_header('Content-Encoding') or not is_compressible(
+                response.get('Content-Type', '')):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+def is_lock_error(exception):
+    return (
+        isinstance(exception, OperationalError)
+        and 'database is locked' in str(exception)
+    )
+
+
+def remember_lock_error(sender, request=None, **kwargs):
+    # Сигнал приходит из блока except, исключение еще в sys.exc_info()
+    if request is not None and is_lock_error(sys.exc_info()[1]):
+        request.database_locked = True
+
+
+class DatabaseLockMiddleware(MiddlewareMixin):
+    """Помечает ответ на запрос, упавший на блокировке базы.
+
+    Страница 500 без DEBUG не говорит о причине, а нагрузочному тесту
+    нужно отличать блокировки SQLite от прочих ошибок. Исключение из
+    любого слоя до этого middleware превращается в ответ раньше, чем
+    сюда дойдет, поэтому причина запоминается по сигналу
+    ``got_request_exception``. В MIDDLEWARE сайта его нет: первым его
+    ставит только core.loadtest.loadtest_application, и только тогда
+    подключается обработчик сигнала.
+    """
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        got_request_exception.connect(
+            remember_lock_error, dispatch_uid=LOCKED_HEADER)
+
+    def process_response(self, request, response):
+        if getattr(request, 'database_locked', False):
+            response[LOCKED_HEADER] = '1'
+        return response
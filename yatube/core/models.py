@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreateModel(models.Model):
@@ -10,3 +11,42 @@ class CreateModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(CreateModel):
+    """Фоновая задача очереди core.taskqueue."""
+    QUEUED = 'queued'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    status = models.CharField(
+        'Состояние', max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    timeout = models.PositiveIntegerField('Срок видимости, с')
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'Занята до', blank=True, null=True)
+    locked_by = models.CharField('Воркер', max_length=100, blank=True)
+    key = models.CharField(
+        'Ключ идемпотентности', max_length=200,
+        unique=True, blank=True, null=True,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'], name='task_ready'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
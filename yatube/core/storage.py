@@ -0,0 +1,79 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.functional import cached_property
+
+from .middleware import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.ico', '.map',
+)
+COMPRESSED_EXTENSIONS = {'gzip': '.gz', 'br': '.br'}
+
+
+def compress(content):
+    """Сжатые копии содержимого: {'gzip': bytes, 'br': bytes}."""
+    versions = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        versions['br'] = brotli.compress(content)
+    return versions
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и готовыми .gz/.br копиями.
+
+    Манифест загружается в память при создании хранилища, поэтому
+    ``{% static %}`` — это поиск в словаре. Файл без записи в манифесте
+    (collectstatic еще не запускали) отдается под исходным именем.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if not dry_run:
+            for hashed_name in sorted(hashed_names):
+                self.save_compressed(hashed_name)
+
+    def save_compressed(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        for encoding, compressed in compress(content).items():
+            if len(compressed) >= len(content):
+                continue
+            path = self.path(name + COMPRESSED_EXTENSIONS[encoding])
+            with open(path, 'wb') as compressed_file:
+                compressed_file.write(compressed)
+
+    @cached_property
+    def hashed_names(self):
+        return set(self.hashed_files.values())
+
+
+def compressed_path(path, accept_encoding):
+    """Путь к сжатой копии файла, подходящей под Accept-Encoding."""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in ('br', 'gzip'):
+        if encoding not in accepted:
+            continue
+        candidate = path + COMPRESSED_EXTENSIONS[encoding]
+        if os.path.exists(candidate):
+            return candidate, encoding
+    return path, None
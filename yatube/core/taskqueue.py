@@ -0,0 +1,183 @@
+"""Очередь фоновых задач в базе данных.
+
+Обработчик запроса ставит задачу через ``enqueue`` и сразу отвечает, а
+``manage.py run_workers`` выполняет задачи в пуле процессов и потоков.
+Воркер забирает задачу условным UPDATE, который выставляет
+``locked_until``: пока этот срок видимости не истек, другие воркеры
+задачу не видят, а если воркер упал, задача сама вернется в очередь.
+Ошибка откладывает повтор с экспоненциальной задержкой, пока не
+кончатся попытки. Задача с ключом идемпотентности ставится один раз.
+Запись результата повторяется, пока SQLite занята другим писателем:
+иначе выполненная задача осталась бы заблокированной и после срока
+видимости выполнилась бы еще раз.
+"""
+import json
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_TIMEOUT = 60
+BACKOFF_BASE = 2
+BACKOFF_MAX = 60 * 60
+CLAIM_CANDIDATES = 10
+STATUS_RETRIES = 10
+STATUS_RETRY_PAUSE = 0.2
+
+REGISTRY = {}
+
+
+class TaskFunction:
+    """Функция-задача: вызывается как обычно или ставится в очередь."""
+
+    def __init__(self, func, priority, max_attempts, timeout):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, key=None, delay=0, priority=None, **kwargs):
+        """Ставит вызов в очередь; аргументы должны сериализоваться в JSON."""
+        if settings.TASKS_EAGER:
+            self.func(*args, **kwargs)
+            return None
+        fields = {
+            'name': self.name,
+            'payload': json.dumps({'args': args, 'kwargs': kwargs}),
+            'priority': self.priority if priority is None else priority,
+            'max_attempts': self.max_attempts,
+            'timeout': self.timeout,
+            'run_at': timezone.now() + timedelta(seconds=delay),
+        }
+        if key is None:
+            return Task.objects.create(**fields)
+        return Task.objects.get_or_create(key=key, defaults=fields)[0]
+
+
+def task(func=None, *, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS,
+         timeout=DEFAULT_TIMEOUT):
+    """Регистрирует функцию как задачу очереди."""
+    def register(func):
+        task_function = TaskFunction(func, priority, max_attempts, timeout)
+        REGISTRY[task_function.name] = task_function
+        return task_function
+
+    return register if func is None else register(func)
+
+
+def worker_name(thread=0):
+    return f'{socket.gethostname()}:{os.getpid()}:{thread}'
+
+
+def backoff(attempts):
+    """Задержка перед повтором: 2, 4, 8... секунд со случайной добавкой."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(1, 1.5)
+
+
+def visible(now):
+    return Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+
+
+def claim(worker):
+    """Забирает самую приоритетную готовую задачу или возвращает None."""
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(visible(now), status=Task.QUEUED, run_at__lte=now)
+        .order_by('-priority', 'run_at', 'pk')
+        .values_list('pk', 'timeout')[:CLAIM_CANDIDATES]
+    )
+    for pk, timeout in candidates:
+        claimed = Task.objects.filter(
+            visible(now), pk=pk, status=Task.QUEUED,
+        ).update(
+            locked_until=now + timedelta(seconds=timeout),
+            locked_by=worker,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def save_status(task, **fields):
+    """UPDATE задачи, который повторяется, пока база заблокирована."""
+    for attempt in range(1, STATUS_RETRIES + 1):
+        try:
+            return Task.objects.filter(pk=task.pk).update(**fields)
+        except OperationalError:
+            if attempt == STATUS_RETRIES:
+                raise
+            time.sleep(STATUS_RETRY_PAUSE * attempt)
+
+
+def run_task(task):
+    """Выполняет забранную задачу и записывает результат."""
+    try:
+        task_function = REGISTRY.get(task.name)
+        if task_function is None:
+            raise LookupError(f'Задача {task.name} не зарегистрирована')
+        payload = json.loads(task.payload)
+        task_function(*payload['args'], **payload['kwargs'])
+    except Exception:
+        fail(task, traceback.format_exc())
+        return False
+    save_status(
+        task, status=Task.DONE, locked_until=None, finished=timezone.now())
+    return True
+
+
+def fail(task, error):
+    now = timezone.now()
+    if task.attempts >= task.max_attempts:
+        save_status(
+            task, status=Task.FAILED, locked_until=None, finished=now,
+            last_error=error,
+        )
+    else:
+        save_status(
+            task, locked_until=None, last_error=error,
+            run_at=now + timedelta(seconds=backoff(task.attempts)),
+        )
+
+
+def work(worker, stop, poll=1.0, burst=False):
+    """Цикл воркера; ``burst`` выходит, когда готовых задач не осталось."""
+    try:
+        while not stop.is_set():
+            try:
+                task = claim(worker)
+                if task is not None:
+                    run_task(task)
+            except OperationalError:
+                # База занята другим писателем дольше повторов записи;
+                # задача вернется в очередь по истечении locked_until
+                stop.wait(poll)
+                continue
+            if task is None:
+                if burst:
+                    return
+                stop.wait(poll)
+    finally:
+        connection.close()
+
+
+def purge_finished(older_than):
+    """Удаляет выполненные задачи старше ``older_than``."""
+    return Task.objects.filter(
+        status=Task.DONE, finished__lt=timezone.now() - older_than,
+    ).delete()[0]
@@ -0,0 +1,11 @@
+from django.core.mail import EmailMultiAlternatives
+
+from .taskqueue import task
+
+
+@task(priority=10)
+def send_email(subject, body, from_email, recipient_list, html=None):
+    message = EmailMultiAlternatives(subject, body, from_email, recipient_list)
+    if html is not None:
+        message.attach_alternative(html, 'text/html')
+    message.send()
@@ -0,0 +1,18 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+# Фоновая запись из другого потока мешала бы транзакциям тестов
+TEST_SETTINGS = {'COUNTER_FLUSH_INTERVAL': None}
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner с настройками TEST_SETTINGS на время прогона."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,4 +1,19 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .storage import compressed_path
+
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
 
 
 def page_not_found(request, exception):
@@ -15,3 +30,36 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def static_serve(request, path):
+    """Статика из STATIC_ROOT с готовыми .br/.gz копиями.
+
+    Файлы с хешем в имени кешируются браузером навсегда.
+    """
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    statobj = os.stat(fullpath)
+    if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            statobj.st_mtime, statobj.st_size):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(fullpath)
+    servepath, encoding = compressed_path(
+        fullpath, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    response = FileResponse(
+        open(servepath, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(statobj.st_mtime)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if path in staticfiles_storage.hashed_names:
+        patch_cache_control(
+            response, public=True, max_age=STATIC_MAX_AGE, immutable=True)
+    return response
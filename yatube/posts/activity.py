@@ -0,0 +1,141 @@
+"""Сводки активности групп и авторов.
+
+Посты в день, самые активные комментаторы и последняя активность не
+считаются агрегатами по Post и Comment на каждый просмотр: сигналы
+создания поста и комментария сдвигают счетчики в ActivityDay и
+ActivityCommenter, а страница читает несколько готовых строк. Сводка
+считает события записи, поэтому удаления и перенос поста в другую группу
+ее не меняют; точные числа по текущим данным пересчитывает команда
+``backfill_activity``.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .authors import get_authors
+from .models import ActivityCommenter, ActivityDay, Comment, Post
+
+ACTIVITY_DAYS = 30
+TOP_COMMENTERS = 5
+BACKFILL_BATCH_SIZE = 1000
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scopes(post):
+    scopes = [author_scope(post.author_id)]
+    if post.group_id is not None:
+        scopes.append(group_scope(post.group_id))
+    return scopes
+
+
+def bump(model, lookup, **deltas):
+    """UPDATE счетчиков строки, а если строки нет — INSERT."""
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Строку только что вставил параллельный запрос
+        model.objects.filter(**lookup).update(**increments)
+
+
+def record_post(post):
+    day = timezone.localdate(post.pub_date)
+    for scope in post_scopes(post):
+        bump(ActivityDay, {'scope': scope, 'day': day}, posts=1)
+
+
+def record_comment(comment):
+    if comment.post_id is None:
+        return
+    day = timezone.localdate(comment.created)
+    for scope in post_scopes(comment.post):
+        bump(ActivityDay, {'scope': scope, 'day': day}, comments=1)
+        bump(ActivityCommenter,
+             {'scope': scope, 'user_id': comment.author_id}, comments=1)
+
+
+def activity(scope, days=ACTIVITY_DAYS):
+    """Дни с постами за ``days`` дней, комментаторы и последний день."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rows = ActivityDay.objects.filter(scope=scope)
+    recent = list(rows.filter(day__gte=since))
+    last = recent[0] if recent else rows.first()
+    commenters = list(
+        ActivityCommenter.objects.filter(scope=scope)
+        .order_by('-comments')[:TOP_COMMENTERS]
+    )
+    authors = get_authors(row.user_id for row in commenters)
+    for row in commenters:
+        row.user_info = authors.get(row.user_id)
+    return {
+        'days': recent,
+        'posts': sum(row.posts for row in recent),
+        'comments': sum(row.comments for row in recent),
+        'commenters': commenters,
+        'last_active': last.day if last is not None else None,
+        'period': days,
+    }
+
+
+def backfill_rows(model, rows, fields):
+    model.objects.bulk_create(
+        (model(**dict(zip(fields, row))) for row in rows),
+        batch_size=BACKFILL_BATCH_SIZE,
+    )
+
+
+def backfill_activity():
+    """Пересчитывает сводки заново по текущим постам и комментариям."""
+    with transaction.atomic():
+        ActivityDay.objects.all().delete()
+        ActivityCommenter.objects.all().delete()
+        days = {}
+        commenters = []
+        for prefix, post_field, comment_field in (
+                ('author', 'author_id', 'post__author_id'),
+                ('group', 'group_id', 'post__group_id')):
+            posts = (
+                Post.objects.exclude(**{post_field: None}).order_by()
+                .values_list(post_field, TruncDate('pub_date'))
+                .annotate(count=Count('pk'))
+            )
+            comments = (
+                Comment.objects.exclude(**{comment_field: None}).order_by()
+                .values_list(comment_field, TruncDate('created'))
+                .annotate(count=Count('pk'))
+            )
+            for field, queryset in (('posts', posts),
+                                    ('comments', comments)):
+                for owner, day, count in queryset.iterator():
+                    row = days.setdefault(
+                        (f'{prefix}:{owner}', day),
+                        {'posts': 0, 'comments': 0})
+                    row[field] = count
+            commenters += [
+                (f'{prefix}:{owner}', user_id, count)
+                for owner, user_id, count in (
+                    Comment.objects.exclude(**{comment_field: None})
+                    .order_by().values_list(comment_field, 'author_id')
+                    .annotate(count=Count('pk')).iterator()
+                )
+            ]
+        backfill_rows(ActivityDay, (
+            (scope, day, row['posts'], row['comments'])
+            for (scope, day), row in days.items()
+        ), ('scope', 'day', 'posts', 'comments'))
+        backfill_rows(
+            ActivityCommenter, commenters, ('scope', 'user_id', 'comments'))
+    return len(days), len(commenters)
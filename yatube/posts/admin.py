@@ -1,8 +1,117 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import (ORDER_VAR, PAGE_VAR, SEARCH_VAR,
+                                             ChangeList)
+
+from .identity import group_choices
 from .models import Post, Group, Comment
+from .tasks import pk_ranges, purge_groups_task, purge_posts_task
+from .util_func import EstimatedCountPaginator, ProbeCountPaginator, parse_id
+
+KEYSET_VAR = 'after'
+
+
+def purge_action(name, purge_task, description):
+    """Действие admin, которое ставит очистку выбранного в очередь."""
+    def action(modeladmin, request, queryset):
+        queued = purge_task.enqueue(pk_ranges(queryset))
+        message = f'{description} поставлено в очередь задач'
+        if queued is not None:
+            message += f' (задача #{queued.pk})'
+        modeladmin.message_user(request, message + '.')
+
+    action.__name__ = f'purge_selected_{name}'
+    action.short_description = 'Удалить пачками в фоне'
+    action.allowed_permissions = ('delete',)
+    return action
+
+
+purge_selected_posts = purge_action(
+    'posts', purge_posts_task, 'Удаление постов')
+purge_selected_groups = purge_action(
+    'groups', purge_groups_task, 'Удаление групп')
+
+
+def skips_count(request):
+    """Страницы ``?after=<pk>`` и поиск строки не считают."""
+    return (
+        getattr(request, 'keyset_after', None) is not None
+        or bool(request.GET.get(SEARCH_VAR, '').strip())
+    )
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist со ссылкой на следующую страницу по pk вместо OFFSET."""
 
+    def get_results(self, request):
+        if skips_count(request):
+            # Без количества «показать все» выгрузило бы весь хвост таблицы
+            self.show_all = False
+        super().get_results(request)
+        self.keyset_next_url = None
+        results = list(self.result_list)
+        if (
+            ORDER_VAR not in self.params
+            and len(results) == self.list_per_page
+        ):
+            self.keyset_next_url = self.get_query_string(
+                {KEYSET_VAR: results[-1].pk}, [PAGE_VAR]
+            )
 
-class PostAdmin(admin.ModelAdmin):
+
+class HighVolumeAdmin(admin.ModelAdmin):
+    """Режим changelist для таблиц с десятками миллионов строк.
+
+    Количество строк оценивается, а не считается, навигация вперед
+    идет по ``?after=<pk>``. Поиск числа идет по pk, остального — по
+    точному имени автора (``@`` в начале можно не писать), оба запроса
+    используют индекс; поиска по подстроке текста здесь нет. Страницы
+    ``?after=<pk>`` и поиск не считают строки совсем, у них COUNT на
+    каждый запрос свой.
+    """
+    ordering = ('-pk',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_fields = ('author__username',)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        paginator = (
+            ProbeCountPaginator if skips_count(request) else self.paginator)
+        return paginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    def changelist_view(self, request, extra_context=None):
+        after = parse_id(request.GET.get(KEYSET_VAR))
+        if KEYSET_VAR in request.GET:
+            request.GET = request.GET.copy()
+            del request.GET[KEYSET_VAR]
+        if after is not None and ORDER_VAR not in request.GET:
+            request.keyset_after = after
+        return super().changelist_view(request, extra_context)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        after = getattr(request, 'keyset_after', None)
+        if after is not None:
+            queryset = queryset.filter(pk__lt=after)
+        return queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        pk = parse_id(search_term)
+        if pk is not None:
+            return queryset.filter(pk=pk), False
+        # icontains по тексту прочитал бы всю таблицу
+        username = search_term[1:] if search_term.startswith('@') else (
+            search_term)
+        return queryset.filter(author__username=username), False
+
+
+class PostAdmin(HighVolumeAdmin):
     list_editable = ('group',)
     list_display = (
         'pk',
@@ -11,16 +120,32 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
+    # Только включает поле поиска: в режиме HighVolumeAdmin по тексту не ищут
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = (purge_selected_posts,)
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs)
+        if db_field.name == 'group':
+            formfield.choices = group_choices(formfield.empty_label)
+        return formfield
 
-class CommentAdmin(admin.ModelAdmin):
+
+class CommentAdmin(HighVolumeAdmin):
     list_display = ('author', 'text', 'created')
-    search_fields = ('author', 'text',)
+    list_select_related = ('author',)
+    raw_id_fields = ('author', 'post', 'parent')
+
+
+class GroupAdmin(admin.ModelAdmin):
+    actions = (purge_selected_groups,)
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
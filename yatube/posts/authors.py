@@ -0,0 +1,77 @@
+"""Снимки авторов для карточек и комментариев.
+
+Карточке нужны только имя пользователя и полное имя автора, поэтому
+вместо JOIN с auth_user в каждом запросе ленты берется компактная запись
+id -> (username, имя, фамилия) из кеша, одна пачка ``get_many`` на всю
+страницу. Промахи дочитываются одним запросом. Сигналы сохранения и
+удаления пользователя сбрасывают его запись.
+"""
+from django.core.cache import cache
+
+from .models import User
+
+AUTHOR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class Author:
+    __slots__ = ('id', 'username', 'first_name', 'last_name')
+
+    def __init__(self, pk, username, first_name, last_name):
+        self.id = pk
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def as_user(self):
+        """Несохраняемый User с полями снимка для шаблонов профиля."""
+        return User(
+            pk=self.id, username=self.username,
+            first_name=self.first_name, last_name=self.last_name,
+        )
+
+    def __str__(self):
+        return self.username
+
+
+def author_cache_key(user_id):
+    return f'authors:{user_id}'
+
+
+def forget_author(user_id):
+    cache.delete(author_cache_key(user_id))
+
+
+def get_authors(user_ids):
+    """Словарь id -> Author; пропавших пользователей в нем нет."""
+    keys = {author_cache_key(pk): pk for pk in set(user_ids)}
+    records = {keys[key]: record for key, record in cache.get_many(
+        keys).items()}
+    missing = set(keys.values()) - set(records)
+    if missing:
+        fetched = {
+            pk: tuple(record) for pk, *record in User.objects.filter(
+                pk__in=missing).values_list(
+                    'pk', 'username', 'first_name', 'last_name')
+        }
+        cache.set_many({
+            author_cache_key(pk): record for pk, record in fetched.items()
+        }, AUTHOR_CACHE_TIMEOUT)
+        records.update(fetched)
+    return {pk: Author(pk, *record) for pk, record in records.items()}
+
+
+def attach_authors(objects):
+    """Прикрепляет к постам или комментариям ``author_info``."""
+    objects = list(objects)
+    authors = get_authors(obj.author_id for obj in objects)
+    for obj in objects:
+        obj.author_info = authors.get(obj.author_id)
+    return objects
@@ -0,0 +1,76 @@
+"""Локальные каналы новых постов.
+
+Ждущие запросы спят на ``threading.Condition`` и просыпаются, когда
+сигнал сохранения поста публикует его после коммита, а не опрашивают
+базу в цикле. ``new_posts`` хранит только последний id, а ``group_posts``
+держит по одной теме на группу с коротким журналом событий, который
+читают все подписчики группы. Каналы живут в памяти процесса: пост,
+созданный другим процессом, сюда не попадет.
+"""
+import threading
+from collections import deque
+
+# Столько событий темы хранится для переподключившихся читателей
+TOPIC_BACKLOG = 100
+
+
+class Channel:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.last_id = 0
+
+    def publish(self, post_id):
+        with self.condition:
+            self.last_id = max(self.last_id, post_id)
+            self.condition.notify_all()
+
+    def wait(self, after, timeout):
+        """Ждет поста новее ``after``; False, если вышел таймаут."""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.last_id > after, timeout)
+
+
+new_posts = Channel()
+
+
+class Topic:
+    """Журнал событий с номерами, общий для всех читателей темы."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=TOPIC_BACKLOG)
+        self.last_seq = 0
+
+    def publish(self, data):
+        with self.condition:
+            self.last_seq += 1
+            self.events.append((self.last_seq, data))
+            self.condition.notify_all()
+
+    def since(self, seq):
+        return [event for event in self.events if event[0] > seq]
+
+    def wait(self, seq, timeout):
+        """События после ``seq``; пустой список, если вышел таймаут."""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.since(seq), timeout)
+
+
+class Hub:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.topics = {}
+
+    def topic(self, key):
+        with self.lock:
+            if key not in self.topics:
+                self.topics[key] = Topic()
+            return self.topics[key]
+
+    def publish(self, key, data):
+        self.topic(key).publish(data)
+
+
+group_posts = Hub()
@@ -0,0 +1,38 @@
+"""Обсуждения под постом как дерево с материализованным путем.
+
+Путь комментария — это pk его предков и его собственный, по 10 цифр на
+уровень, поэтому сортировка по пути дает дерево в порядке обхода, а
+поддерево — непрерывный диапазон индекса (post, path). Окно из
+нескольких верхних обсуждений со всеми ответами читается одним
+диапазонным запросом от пути первого корня до конца последнего.
+"""
+from .models import Comment
+
+THREADS_PER_PAGE = 20
+# Следующий после цифр символ: путь потомка всегда меньше prefix + ':'
+PATH_END = ':'
+
+
+def subtree(comments, path):
+    return comments.filter(path__gte=path, path__lt=path + PATH_END)
+
+
+def thread(comment):
+    """Комментарий со всеми ответами в порядке обхода дерева."""
+    return subtree(
+        Comment.objects.filter(post_id=comment.post_id), comment.path)
+
+
+def thread_window(post, after=None, size=THREADS_PER_PAGE):
+    """Обсуждения после курсора ``after`` и курсор следующего окна."""
+    roots = post.comments.filter(parent__isnull=True)
+    if after:
+        roots = roots.filter(path__gt=after)
+    paths = list(roots.values_list('path', flat=True)[:size + 1])
+    if not paths:
+        return [], None
+    next_cursor = paths[size - 1] if len(paths) > size else None
+    paths = paths[:size]
+    comments = post.comments.filter(
+        path__gte=paths[0], path__lt=paths[-1] + PATH_END)
+    return list(comments), next_cursor
@@ -0,0 +1,119 @@
+"""Счетчики постов, которые копятся в памяти и пишутся в базу пачками.
+
+Обновление счетчика в строке поста на каждый лайк выстроило бы все
+запросы популярного поста в очередь за блокировкой записи SQLite. Здесь
+приращения складываются в буфер процесса, а фоновый поток раз в
+COUNTER_FLUSH_INTERVAL секунд переносит их в базу одним
+``UPDATE ... SET field = field + CASE id WHEN ... END`` на пачку постов,
+а набравший FLUSH_BATCH_SIZE постов буфер будит его раньше срока. Поэтому
+при падении процесса теряется не больше интервала и не больше пачки
+приращений, а ``lag()`` показывает, сколько ждет самое старое из них.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+class CounterBuffer:
+    """Буфер приращений поля ``field`` модели ``model``."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.deltas = Counter()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.flusher = None
+        # Когда в пустой буфер пришло первое приращение
+        self.oldest = None
+        self.last_flush = None
+
+    def add(self, pk, delta=1):
+        with self.lock:
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            self.deltas[pk] += delta
+            if len(self.deltas) >= FLUSH_BATCH_SIZE:
+                self.wakeup.set()
+        self.start_flusher()
+
+    def pending(self, pks):
+        """Еще не записанные приращения для ``pks``."""
+        with self.lock:
+            return {pk: self.deltas[pk] for pk in pks if pk in self.deltas}
+
+    def lag(self):
+        """Сколько секунд ждет записи самое старое приращение."""
+        with self.lock:
+            if self.oldest is None:
+                return 0
+            return time.monotonic() - self.oldest
+
+    def flush(self):
+        """Переносит приращения в базу; возвращает число строк."""
+        with self.lock:
+            deltas, self.deltas = self.deltas, Counter()
+            oldest, self.oldest = self.oldest, None
+        deltas = [(pk, delta) for pk, delta in deltas.items() if delta]
+        written = 0
+        try:
+            for start in range(0, len(deltas), FLUSH_BATCH_SIZE):
+                batch = deltas[start:start + FLUSH_BATCH_SIZE]
+                self.write(batch)
+                written += len(batch)
+        except DatabaseError:
+            # Незаписанное вернется в буфер и уйдет со следующей попыткой
+            with self.lock:
+                self.deltas.update(dict(deltas[written:]))
+                self.oldest = oldest
+            raise
+        self.last_flush = time.time()
+        return written
+
+    def write(self, batch):
+        increment = Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in batch],
+            default=Value(0), output_field=IntegerField(),
+        )
+        self.model.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+            **{self.field: F(self.field) + increment})
+
+    def start_flusher(self):
+        interval = settings.COUNTER_FLUSH_INTERVAL
+        if not interval or self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(
+                target=self.run_flusher, args=(interval,), daemon=True)
+        self.flusher.start()
+        atexit.register(self.flush_at_exit)
+
+    def flush_at_exit(self):
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception('Flushing %s at exit failed', self.field)
+
+    def run_flusher(self, interval):
+        while True:
+            self.wakeup.wait(interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception('Flushing %s failed, lag %.0f s',
+                                 self.field, self.lag())
+            finally:
+                connection.close()
@@ -0,0 +1,188 @@
+"""RSS/Atom ленты сайта, групп и авторов.
+
+Готовая лента хранится в кеше до следующей записи поста, которая ее
+касается: сигналы меняют версию ленты, а версия же служит ETag и
+Last-Modified. Поэтому повторный опрос без изменений отвечает 304 без
+единого запроса к базе.
+"""
+import time
+from datetime import datetime, timezone
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from .authors import get_authors
+from .identity import get_group_or_404, user_id_or_404
+from .models import Post
+
+FEED_SIZE = 20
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def feed_version_key(scope):
+    return f'feed-version:{scope}'
+
+
+def feed_version(scope):
+    """Время последнего изменения ленты, заводится при первом запросе."""
+    key = feed_version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def touch_feeds(author_id, *group_ids):
+    """Сбрасывает версии лент, которые затронула запись поста."""
+    scopes = ['site', f'author:{author_id}']
+    scopes += [f'group:{pk}' for pk in group_ids if pk is not None]
+    version = time.time_ns()
+    cache.set_many(
+        {feed_version_key(scope): version for scope in scopes}, None)
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def feed_posts(self, obj):
+        return Post.objects.feed()
+
+    def items(self, obj):
+        return self.feed_posts(obj)[:FEED_SIZE]
+
+    def item_title(self, item):
+        return item.text[:50]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_group_or_404(slug)
+
+    def title(self, obj):
+        return f'Yatube: записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=[obj.slug])
+
+    def feed_posts(self, obj):
+        return obj.posts.feed()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        author_id = user_id_or_404(username)
+        author = get_authors([author_id]).get(author_id)
+        if author is None:
+            # Имя еще в кеше, а пользователь уже удален
+            raise Http404('No User matches the given query.')
+        return author.as_user()
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Новые записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def feed_posts(self, obj):
+        return obj.posts.feed()
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class LatestPostsAtomFeed(AtomFeedMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+def cached_feed(feed, scope):
+    """View ленты с кешем по версии и условным GET.
+
+    ``scope`` получает kwargs из URL и возвращает имя ленты для версии.
+    """
+    def version(request, **kwargs):
+        return feed_version(scope(**kwargs))
+
+    def etag(request, **kwargs):
+        return f'{type(feed).__name__}-{version(request, **kwargs)}'
+
+    def last_modified(request, **kwargs):
+        return datetime.fromtimestamp(
+            version(request, **kwargs) // 10 ** 9, tz=timezone.utc)
+
+    @condition(etag_func=etag, last_modified_func=last_modified)
+    def view(request, **kwargs):
+        key = f'feed:{etag(request, **kwargs)}:{scope(**kwargs)}'
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = feed(request, **kwargs)
+        # Last-Modified выставит condition по версии ленты
+        del response['Last-Modified']
+        cache.set(
+            key, (response.content, response['Content-Type']),
+            FEED_CACHE_TIMEOUT,
+        )
+        return response
+
+    return view
+
+
+def site_scope():
+    return 'site'
+
+
+def group_scope(slug):
+    return f'group:{get_group_or_404(slug).pk}'
+
+
+def author_scope(username):
+    return f'author:{user_id_or_404(username)}'
+
+
+site_rss = cached_feed(LatestPostsFeed(), site_scope)
+site_atom = cached_feed(LatestPostsAtomFeed(), site_scope)
+group_rss = cached_feed(GroupPostsFeed(), group_scope)
+group_atom = cached_feed(GroupPostsAtomFeed(), group_scope)
+author_rss = cached_feed(AuthorPostsFeed(), author_scope)
+author_atom = cached_feed(AuthorPostsAtomFeed(), author_scope)
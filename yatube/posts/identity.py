@@ -0,0 +1,98 @@
+"""Поиск групп по slug и пользователей по username через кеш.
+
+Страницы групп и профилей начинаются с поиска по естественному ключу из
+адреса. Здесь ответ берется из кеша: для группы — ее поля, из которых
+собирается объект как после выборки, для имени — id пользователя.
+Несуществующие ключи, которые любят перебирать боты, тоже кешируются
+(MISSING), но на короткий срок. Сигналы сохранения и удаления групп и
+пользователей переписывают записи, так что кеш не устаревает и не
+прячет только что созданную группу или нового пользователя.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Group, User
+
+IDENTITY_CACHE_TIMEOUT = 60 * 60 * 24
+NEGATIVE_CACHE_TIMEOUT = 60 * 5
+MISSING = 0
+GROUP_FIELDS = ('id', 'title', 'slug', 'description')
+GROUP_CHOICES_CACHE_KEY = 'admin:group_choices'
+
+
+def timeout_for(value):
+    return NEGATIVE_CACHE_TIMEOUT if value == MISSING else (
+        IDENTITY_CACHE_TIMEOUT)
+
+
+def natural_cache_key(prefix, value):
+    # Кириллица и пробелы в slug и имени недопустимы в ключах memcached
+    return f'{prefix}:' + hashlib.md5(value.encode()).hexdigest()
+
+
+def username_cache_key(username):
+    return natural_cache_key('usernames', username)
+
+
+def remember_username(username, user_id):
+    cache.set(username_cache_key(username), user_id, timeout_for(user_id))
+
+
+def user_ids(usernames):
+    """Словарь username -> id для существующих имен из ``usernames``."""
+    keys = {username_cache_key(name): name for name in usernames}
+    found = {keys[key]: pk for key, pk in cache.get_many(keys).items()}
+    missing = set(usernames) - set(found)
+    if missing:
+        rows = dict(User.objects.filter(
+            username__in=missing).values_list('username', 'pk'))
+        by_timeout = {}
+        for name in missing:
+            found[name] = rows.get(name, MISSING)
+            by_timeout.setdefault(timeout_for(found[name]), {})[
+                username_cache_key(name)] = found[name]
+        for timeout, records in by_timeout.items():
+            cache.set_many(records, timeout)
+    return {name: pk for name, pk in found.items() if pk != MISSING}
+
+
+def user_id_or_404(username):
+    user_id = user_ids({username}).get(username)
+    if user_id is None:
+        raise Http404('No User matches the given query.')
+    return user_id
+
+
+def group_choices(empty_label):
+    """Список групп для <select> в admin, один на весь changelist."""
+    choices = cache.get(GROUP_CHOICES_CACHE_KEY)
+    if choices is None:
+        choices = list(Group.objects.values_list('pk', 'title'))
+        cache.set(GROUP_CHOICES_CACHE_KEY, choices)
+    return [('', empty_label)] + choices
+
+
+def group_cache_key(slug):
+    return natural_cache_key('groups', slug)
+
+
+def remember_group(group):
+    record = tuple(getattr(group, field) for field in GROUP_FIELDS)
+    cache.set(group_cache_key(group.slug), record, IDENTITY_CACHE_TIMEOUT)
+
+
+def forget_group(slug):
+    cache.set(group_cache_key(slug), MISSING, NEGATIVE_CACHE_TIMEOUT)
+
+
+def get_group_or_404(slug):
+    record = cache.get(group_cache_key(slug))
+    if record is None:
+        record = Group.objects.filter(slug=slug).values_list(
+            *GROUP_FIELDS).first() or MISSING
+        cache.set(group_cache_key(slug), record, timeout_for(record))
+    if record == MISSING:
+        raise Http404('No Group matches the given query.')
+    return Group.from_db('default', GROUP_FIELDS, record)
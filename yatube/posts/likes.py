@@ -0,0 +1,45 @@
+"""Лайки постов.
+
+Связь (user, post) уникальна и пишется сразу, а число лайков в строке
+поста обновляется через буфер ``like_counts`` пачками. Карточки ленты
+берут число из самой строки поста плюс незаписанное приращение, а
+отметка «мне нравится» для всей страницы читается одним запросом.
+"""
+from django.db import IntegrityError, transaction
+
+from .counters import CounterBuffer
+from .models import Like, Post
+
+like_counts = CounterBuffer(Post, 'like_count')
+
+
+def like(user, post_id):
+    try:
+        with transaction.atomic():
+            Like.objects.create(user=user, post_id=post_id)
+    except IntegrityError:
+        return False
+    like_counts.add(post_id, 1)
+    return True
+
+
+def unlike(user, post_id):
+    deleted = Like.objects.filter(user=user, post_id=post_id).delete()[0]
+    if deleted:
+        like_counts.add(post_id, -1)
+    return bool(deleted)
+
+
+def attach_likes(posts, user):
+    """Прикрепляет к постам ``likes_total`` и ``liked``."""
+    posts = list(posts)
+    pending = like_counts.pending([post.pk for post in posts])
+    liked = set()
+    if user.is_authenticated and posts:
+        liked = set(Like.objects.filter(
+            user=user, post__in=[post.pk for post in posts],
+        ).values_list('post_id', flat=True))
+    for post in posts:
+        post.likes_total = post.like_count + pending.get(post.pk, 0)
+        post.liked = post.pk in liked
+    return posts
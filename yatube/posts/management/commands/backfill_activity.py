@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.activity import backfill_activity
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сводки активности групп и авторов '
+        'по текущим постам и комментариям.'
+    )
+
+    def handle(self, *args, **options):
+        days, commenters = backfill_activity()
+        self.stdout.write(
+            f'Дней активности: {days}, комментаторов: {commenters}')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит карту сайта шардами по 50 тысяч адресов, '
+        'переписывая только изменившиеся шарды.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help='по умолчанию SITE_URL')
+        parser.add_argument('--root', help='по умолчанию SITEMAP_ROOT')
+        parser.add_argument('--force', action='store_true',
+                            help='переписать все шарды')
+
+    def progress(self, name, written):
+        status = 'записан' if written else 'без изменений'
+        self.stdout.write(f'  {name}: {status}')
+
+    def handle(self, *args, **options):
+        written = build_sitemaps(
+            root=options['root'],
+            base_url=options['base_url'],
+            force=options['force'],
+            progress=self.progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, переписано шардов: {len(written)}'))
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import collect_media_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов и миниатюры, на которые нет ссылок '
+        'и которые старше льготного срока.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='только показать, что будет удалено')
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='не трогать файлы моложе этого срока')
+        parser.add_argument('--rate', type=float, default=0,
+                            help='не больше стольких удалений в секунду')
+
+    def handle(self, *args, **options):
+        def log(kind, name, size):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {kind}: {name} ({size} Б)')
+
+        report = collect_media_garbage(
+            timedelta(hours=options['grace_hours']),
+            dry_run=options['dry_run'], rate=options['rate'], log=log,
+        )
+        action = 'к удалению' if options['dry_run'] else 'удалено'
+        for kind, title in (('images', 'Картинки'),
+                            ('thumbnails', 'Миниатюры')):
+            self.stdout.write(
+                f'{title}: просмотрено {report[f"{kind}_scanned"]}, '
+                f'{action} {report[f"{kind}_deleted"]} '
+                f'({report[f"{kind}_bytes"]} Б), '
+                f'моложе срока {report[f"{kind}_young"]}'
+            )
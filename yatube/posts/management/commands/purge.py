@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Group, Post, User
+from posts.purge import PURGE_BATCH_SIZE, purge_group, purge_posts, purge_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей, посты и группы небольшими пачками. '
+        'Прерванную очистку можно запустить повторно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[],
+                            help='username удаляемого пользователя')
+        parser.add_argument('--group', action='append', default=[],
+                            help='slug удаляемой группы')
+        parser.add_argument('--post', action='append', default=[], type=int,
+                            help='id удаляемого поста')
+        parser.add_argument('--batch-size', type=int,
+                            default=PURGE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0,
+                            help='пауза между пачками в секундах')
+
+    def progress(self, stage, done):
+        self.stdout.write(f'  {stage}: {done}')
+
+    def handle(self, *args, **options):
+        kwargs = {
+            'batch_size': options['batch_size'],
+            'pause': options['pause'],
+            'progress': self.progress,
+        }
+        if not (options['user'] or options['group'] or options['post']):
+            raise CommandError('Укажите --user, --group или --post.')
+        users = User.objects.filter(username__in=options['user'])
+        groups = Group.objects.filter(slug__in=options['group'])
+        for user in users:
+            self.stdout.write(f'Пользователь {user.username}')
+            purge_user(user, **kwargs)
+        for group in groups:
+            self.stdout.write(f'Группа {group.slug}')
+            purge_group(group, **kwargs)
+        if options['post']:
+            self.stdout.write('Посты')
+            purge_posts(Post.objects.filter(pk__in=options['post']), **kwargs)
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,138 @@
+"""Удаление картинок и миниатюр, на которые больше нет ссылок.
+
+Замененная в ``post_edit`` или оставшаяся от удаленного поста картинка
+лежит в MEDIA_ROOT вечно. Сборщик читает из базы потоком имена картинок
+постов и миниатюры этих картинок из хранилища sorl, затем обходит папки
+картинок и миниатюр через ``os.scandir`` и удаляет файлы без ссылок.
+Файлы моложе льготного срока не трогаются: это может быть загрузка,
+пост которой еще не записан, или только что созданная миниатюра.
+"""
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .models import Post
+
+ITERATOR_CHUNK_SIZE = 2000
+LOOKUP_BATCH_SIZE = 500
+
+
+def referenced_images():
+    """Имена картинок, на которые ссылаются посты."""
+    names = Post.objects.exclude(image='').values_list('image', flat=True)
+    return set(names.iterator(chunk_size=ITERATOR_CHUNK_SIZE))
+
+
+def referenced_thumbnails(images):
+    """Имена миниатюр картинок ``images`` по хранилищу sorl."""
+    source_keys = {ImageFile(name, default_storage).key for name in images}
+    thumbnail_keys = []
+    lists = KVStoreModel.objects.filter(
+        key__startswith=add_prefix('', 'thumbnails'),
+    ).values_list('key', 'value')
+    for key, value in lists.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        if del_prefix(key) in source_keys:
+            thumbnail_keys.extend(deserialize(value))
+    names = set()
+    for start in range(0, len(thumbnail_keys), LOOKUP_BATCH_SIZE):
+        batch = thumbnail_keys[start:start + LOOKUP_BATCH_SIZE]
+        values = KVStoreModel.objects.filter(
+            key__in=[add_prefix(key) for key in batch],
+        ).values_list('value', flat=True)
+        names.update(deserialize(value)['name'] for value in values)
+    return names
+
+
+def scan_files(root):
+    """Файлы под ``root`` рекурсивно, как DirEntry."""
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def remove_empty_dirs(root):
+    for path, dirs, files in os.walk(root, topdown=False):
+        if path != root and not dirs and not files:
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+
+class Collector:
+    """Один проход сборщика; итоги копятся в ``report``."""
+
+    def __init__(self, grace, dry_run=False, rate=0,
+                 log=lambda kind, name, size: None):
+        self.cutoff = time.time() - grace.total_seconds()
+        self.dry_run = dry_run
+        self.pause = 1 / rate if rate else 0
+        self.log = log
+        self.report = Counter()
+
+    def collect(self):
+        images = referenced_images()
+        thumbnails = referenced_thumbnails(images)
+        upload_to = Post._meta.get_field('image').upload_to
+        self.sweep('images', upload_to, images)
+        self.sweep('thumbnails', thumbnail_settings.THUMBNAIL_PREFIX,
+                   thumbnails)
+        return self.report
+
+    def sweep(self, kind, directory, keep):
+        root = os.path.join(settings.MEDIA_ROOT, directory)
+        for entry in scan_files(root):
+            name = os.path.relpath(entry.path, settings.MEDIA_ROOT).replace(
+                os.sep, '/')
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Миниатюру уже удалил sorl вместе с ее картинкой
+                continue
+            self.report[f'{kind}_scanned'] += 1
+            if name in keep:
+                continue
+            if stat.st_mtime > self.cutoff:
+                self.report[f'{kind}_young'] += 1
+                continue
+            self.report[f'{kind}_deleted'] += 1
+            self.report[f'{kind}_bytes'] += stat.st_size
+            self.log(kind, name, stat.st_size)
+            if not self.dry_run:
+                self.delete(kind, name, entry.path)
+        if not self.dry_run:
+            remove_empty_dirs(root)
+
+    def delete(self, kind, name, path):
+        if kind == 'images':
+            # Имя может достаться новой загрузке, ее миниатюры не должны
+            # найтись в хранилище sorl по старому ключу
+            default.kvstore.delete(ImageFile(name, default_storage))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        if self.pause:
+            time.sleep(self.pause)
+
+
+def collect_media_garbage(grace, dry_run=False, rate=0,
+                          log=lambda kind, name, size: None):
+    """Удаляет картинки и миниатюры без ссылок, возвращает отчет."""
+    return Collector(grace, dry_run, rate, log).collect()
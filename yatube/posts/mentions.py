@@ -0,0 +1,59 @@
+"""Упоминания @username в постах и комментариях.
+
+Имена разбираются один раз при записи текста: все имена одного текста
+превращаются в id одним запросом, результат хранится в связи
+``mentions``, а уведомления получают только новые упомянутые. Ссылки
+при отрисовке строятся по сохраненной связи: ее строки для всей страницы
+читаются одним запросом, а текущие имена упомянутых берутся из снимков
+posts.authors. Ссылкой становится ``@имя``, совпадающее с текущим именем
+одного из упомянутых, поэтому после переименования старое ``@имя`` в
+тексте остается просто текстом и не ведет на чужой профиль.
+"""
+import re
+
+from .authors import get_authors
+from .identity import user_ids
+from .models import Notification
+from .notifications import notify
+
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]*\w)')
+
+
+def parse_mentions(text):
+    return set(MENTION_RE.findall(text))
+
+
+def attach_mentions(objects):
+    """Прикрепляет к постам или комментариям ``mentioned_usernames``."""
+    objects = list(objects)
+    pairs = []
+    for model in {type(obj) for obj in objects}:
+        same = [obj for obj in objects if type(obj) is model]
+        column = f'{model._meta.model_name}_id'
+        pairs.extend(
+            ((model, obj_id), user_id)
+            for obj_id, user_id in model.mentions.through.objects.filter(
+                **{f'{column}__in': [obj.pk for obj in same]}
+            ).values_list(column, 'user_id')
+        )
+    authors = get_authors(user_id for _, user_id in pairs)
+    usernames = {}
+    for key, user_id in pairs:
+        if user_id in authors:
+            usernames.setdefault(key, set()).add(authors[user_id].username)
+    for obj in objects:
+        obj.mentioned_usernames = usernames.get((type(obj), obj.pk), set())
+    return objects
+
+
+def update_mentions(obj, author, post):
+    """Сохраняет упомянутых в ``obj.mentions`` и уведомляет новых."""
+    mentioned = set(user_ids(parse_mentions(obj.text)).values())
+    current = set(obj.mentions.values_list('pk', flat=True))
+    added = mentioned - current
+    if current - mentioned:
+        obj.mentions.remove(*(current - mentioned))
+    if added:
+        obj.mentions.add(*added)
+        notify(added, author, Notification.MENTION, post)
+    return added
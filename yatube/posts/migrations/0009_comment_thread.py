@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def fill_paths(apps, schema_editor):
+    """Старые комментарии становятся корнями своих обсуждений."""
+    Comment = apps.get_model('posts', 'Comment')
+    comments = Comment.objects.filter(path='').order_by('pk')
+    while True:
+        batch = list(comments[:BATCH_SIZE])
+        if not batch:
+            return
+        for comment in batch:
+            comment.path = f'{comment.pk:010d}'
+        Comment.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_notification'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ('path',)},
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=80, verbose_name='Путь в обсуждении'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_thread'),
+        ),
+    ]
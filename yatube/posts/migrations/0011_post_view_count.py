@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_like'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='view_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Просмотров'),
+        ),
+    ]
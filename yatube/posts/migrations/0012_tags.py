@@ -0,0 +1,75 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+TAG_RE = re.compile(r'(?<![\w#])#(\w+)')
+BATCH_SIZE = 1000
+
+
+def index_tags(apps, schema_editor):
+    """Строит индекс тегов для уже написанных постов."""
+    Post = apps.get_model('posts', 'Post')
+    Tag = apps.get_model('posts', 'Tag')
+    PostTag = apps.get_model('posts', 'PostTag')
+    tags = {}
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'text')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        links = []
+        for pk, text in batch:
+            names = {name.lower() for name in TAG_RE.findall(text)
+                     if len(name) <= 64}
+            for name in names:
+                if name not in tags:
+                    tags[name] = Tag.objects.create(name=name)
+                tags[name].post_count += 1
+                links.append(PostTag(post_id=pk, tag_id=tags[name].pk))
+        PostTag.objects.bulk_create(links)
+        last_pk = batch[-1][0]
+    Tag.objects.bulk_update(tags.values(), ['post_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True, verbose_name='Название')),
+                ('post_count', models.IntegerField(db_index=True, default=0, verbose_name='Постов')),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Post', verbose_name='Пост')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Tag', verbose_name='Тег')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='posts', through='posts.PostTag', to='posts.Tag', verbose_name='Теги'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('tag', 'post'), name='unique_post_tag'),
+        ),
+        migrations.RunPython(index_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='mentions',
+            field=models.ManyToManyField(blank=True, related_name='mentioned_in_comments', to=settings.AUTH_USER_MODEL, verbose_name='Упомянутые'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='mentions',
+            field=models.ManyToManyField(blank=True, related_name='mentioned_in_posts', to=settings.AUTH_USER_MODEL, verbose_name='Упомянутые'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('comment', 'Новый комментарий'), ('post', 'Новый пост'), ('follow', 'Новый подписчик'), ('mention', 'Упоминание')], max_length=16, verbose_name='Тип'),
+        ),
+    ]
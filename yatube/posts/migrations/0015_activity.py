@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_post_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityCommenter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32, verbose_name='Лента')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментариев')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ActivityDay',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32, verbose_name='Лента')),
+                ('day', models.DateField(verbose_name='День')),
+                ('posts', models.IntegerField(default=0, verbose_name='Постов')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментариев')),
+            ],
+            options={
+                'ordering': ('-day',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='activityday',
+            constraint=models.UniqueConstraint(fields=('scope', 'day'), name='unique_activity_day'),
+        ),
+        migrations.AddField(
+            model_name='activitycommenter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Комментатор'),
+        ),
+        migrations.AddIndex(
+            model_name='activitycommenter',
+            index=models.Index(fields=['scope', '-comments'], name='activity_top_commenters'),
+        ),
+        migrations.AddConstraint(
+            model_name='activitycommenter',
+            constraint=models.UniqueConstraint(fields=('scope', 'user'), name='unique_activity_commenter'),
+        ),
+    ]
@@ -1,15 +1,75 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Колонки автора и группы, которые ленты не показывают
+FEED_DEFERRED_FIELDS = (
+    'author__password',
+    'author__last_login',
+    'author__is_superuser',
+    'author__email',
+    'author__is_staff',
+    'author__is_active',
+    'author__date_joined',
+    'group__description',
+)
+COMMENT_COUNT = 'comment_count'
+# Путь комментария — pk предков и его собственный, по 10 цифр на уровень
+PATH_SEGMENT_WIDTH = 10
+MAX_COMMENT_DEPTH = 8
+TAG_MAX_LENGTH = 64
+
+
+class PostQuerySet(models.QuerySet):
+    def feed(self, comment_count=False, author=True):
+        """Посты для лент: автор и группа тем же запросом.
+
+        ``comment_count`` добавляет число комментариев подзапросом, который
+        считается только для строк страницы. ``author=False`` не соединяет
+        auth_user для страниц, которые берут авторов из posts.authors.
+        """
+        related = ('author', 'group') if author else ('group',)
+        posts = self.select_related(*related).defer(*(
+            field for field in FEED_DEFERRED_FIELDS
+            if field.split('__')[0] in related
+        ))
+        if comment_count:
+            comments = (
+                Comment.objects.filter(post=OuterRef('pk')).order_by()
+                .values('post').annotate(count=Count('pk')).values('count')
+            )
+            posts = posts.annotate(**{COMMENT_COUNT: Coalesce(
+                Subquery(comments, output_field=IntegerField()), 0)})
+        return posts
+
+    def count(self):
+        # Подзапрос комментариев в COUNT(*) выполнился бы для каждой строки
+        if (
+            self._result_cache is None
+            and COMMENT_COUNT in self.query.annotations
+        ):
+            posts = self._chain()
+            del posts.query.annotations[COMMENT_COUNT]
+            mask = posts.query.annotation_select_mask
+            if mask is not None:
+                posts.query.set_annotation_mask(mask - {COMMENT_COUNT})
+            return posts.count()
+        return super().count()
+
 
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст',
         help_text='Текст нового поста',
     )
-    pub_date = models.DateTimeField(verbose_name='Дата', auto_now_add=True)
+    pub_date = models.DateTimeField(
+        verbose_name='Дата',
+        auto_now_add=True,
+        db_index=True,
+    )
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
@@ -29,12 +89,32 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    like_count = models.IntegerField(
+        'Лайков', default=0, editable=False)
+    view_count = models.IntegerField(
+        'Просмотров', default=0, editable=False)
+    tags = models.ManyToManyField(
+        'Tag',
+        through='PostTag',
+        related_name='posts',
+        verbose_name='Теги',
+        blank=True,
+    )
+    mentions = models.ManyToManyField(
+        User,
+        related_name='mentioned_in_posts',
+        verbose_name='Упомянутые',
+        blank=True,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
-        ordering = ('-pub_date',)
+        # pk разводит посты с одинаковым временем, как в курсоре прокрутки
+        ordering = ('-pub_date', '-pk')
 
 
 class Group(models.Model):
@@ -46,6 +126,41 @@ class Group(models.Model):
         return self.title
 
 
+class Tag(models.Model):
+    name = models.CharField('Название', max_length=TAG_MAX_LENGTH, unique=True)
+    # Число постов с тегом ведется при каждой правке, а не считается COUNT
+    post_count = models.IntegerField('Постов', default=0, db_index=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Пост',
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Тег',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'post'],
+                name='unique_post_tag'
+            )
+        ]
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -70,10 +185,56 @@ class Comment(models.Model):
         'Дата публикации комментария',
         auto_now_add=True
     )
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на',
+    )
+    path = models.CharField(
+        'Путь в обсуждении',
+        max_length=PATH_SEGMENT_WIDTH * MAX_COMMENT_DEPTH,
+        blank=True,
+        editable=False,
+    )
+    mentions = models.ManyToManyField(
+        User,
+        related_name='mentioned_in_comments',
+        verbose_name='Упомянутые',
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ('path',)
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_thread'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def depth(self):
+        return max(len(self.path) // PATH_SEGMENT_WIDTH - 1, 0)
+
+    def save(self, *args, **kwargs):
+        """Путь известен только после INSERT, поэтому пишется вторым шагом."""
+        if self.path:
+            return super().save(*args, **kwargs)
+        parent_path = ''
+        if self.parent_id is not None:
+            parent_path = self.parent.path
+            if len(parent_path) >= self._meta.get_field('path').max_length:
+                # Слишком глубокий ответ становится соседом родителя
+                parent_path = parent_path[:-PATH_SEGMENT_WIDTH]
+                self.parent_id = int(parent_path[-PATH_SEGMENT_WIDTH:])
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = parent_path + f'{self.pk:0{PATH_SEGMENT_WIDTH}d}'
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -94,3 +255,118 @@ class Follow(models.Model):
                 name='unique_following'
             )
         ]
+
+
+class Like(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name='Пользователь',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name='Пост',
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_like'
+            )
+        ]
+
+
+class Notification(models.Model):
+    COMMENT = 'comment'
+    POST = 'post'
+    FOLLOW = 'follow'
+    MENTION = 'mention'
+    KIND_CHOICES = (
+        (COMMENT, 'Новый комментарий'),
+        (POST, 'Новый пост'),
+        (FOLLOW, 'Новый подписчик'),
+        (MENTION, 'Упоминание'),
+    )
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор события',
+    )
+    kind = models.CharField('Тип', max_length=16, choices=KIND_CHOICES)
+    post = models.ForeignKey(
+        Post,
+        blank=True, null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост',
+    )
+    is_read = models.BooleanField('Прочитано', default=False)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pk',)
+        indexes = [
+            models.Index(
+                fields=['recipient', '-id'], name='notification_inbox'),
+            models.Index(
+                fields=['recipient', 'is_read'], name='notification_unread'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()}: {self.actor}'
+
+
+class ActivityDay(models.Model):
+    """Сколько постов и комментариев было в ленте за день.
+
+    ``scope`` — как у версий RSS-лент: ``group:<id>`` или ``author:<id>``.
+    """
+    scope = models.CharField('Лента', max_length=32)
+    day = models.DateField('День')
+    posts = models.IntegerField('Постов', default=0)
+    comments = models.IntegerField('Комментариев', default=0)
+
+    class Meta:
+        ordering = ('-day',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'day'],
+                name='unique_activity_day'
+            )
+        ]
+
+
+class ActivityCommenter(models.Model):
+    """Сколько комментариев пользователь оставил в ленте."""
+    scope = models.CharField('Лента', max_length=32)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Комментатор',
+    )
+    comments = models.IntegerField('Комментариев', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'user'],
+                name='unique_activity_commenter'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['scope', '-comments'], name='activity_top_commenters'),
+        ]
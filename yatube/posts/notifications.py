@@ -0,0 +1,116 @@
+"""Уведомления о комментариях, постах и подписках.
+
+Рассылка подписчикам пишется пачками через ``bulk_create``, о новом посте —
+в очереди задач, а не в запросе автора. Число непрочитанных хранится в
+кеше, поэтому значок в шапке не делает запросов к базе. Ключ счетчика
+версионный, как у RSS-лент: рассылка и просмотр меняют версию получателя,
+так что число, посчитанное до записи и сохраненное после, уже не читается.
+"""
+import time
+
+from django.core.cache import cache
+
+from .models import Follow, Notification
+
+FAN_OUT_BATCH_SIZE = 1000
+INBOX_PAGE_SIZE = 20
+UNREAD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def unread_version_key(user_id):
+    return f'notifications:unread-version:{user_id}'
+
+
+def unread_cache_key(user_id, version):
+    return f'notifications:unread:{user_id}:{version}'
+
+
+def unread_version(user_id):
+    key = unread_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, UNREAD_CACHE_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+def forget_unread(user_ids):
+    version = time.time_ns()
+    cache.set_many(
+        {unread_version_key(pk): version for pk in user_ids},
+        UNREAD_CACHE_TIMEOUT,
+    )
+
+
+def unread_count(user):
+    key = unread_cache_key(user.pk, unread_version(user.pk))
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient=user, is_read=False).count()
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def notify(recipient_ids, actor, kind, post=None):
+    """Создает уведомления пачками и сбрасывает счетчики получателей."""
+    batch = []
+    for recipient_id in recipient_ids:
+        if recipient_id == actor.pk:
+            continue
+        batch.append(recipient_id)
+        if len(batch) >= FAN_OUT_BATCH_SIZE:
+            _create_batch(batch, actor, kind, post)
+            batch = []
+    if batch:
+        _create_batch(batch, actor, kind, post)
+
+
+def _create_batch(recipient_ids, actor, kind, post):
+    Notification.objects.bulk_create(
+        Notification(
+            recipient_id=recipient_id, actor=actor, kind=kind, post=post)
+        for recipient_id in recipient_ids
+    )
+    forget_unread(recipient_ids)
+
+
+def notify_comment(comment):
+    recipients = {comment.post.author_id}
+    if comment.parent is not None:
+        recipients.add(comment.parent.author_id)
+    notify(recipients, comment.author, Notification.COMMENT, comment.post)
+
+
+def notify_post(post):
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        'user_id', flat=True)
+    notify(
+        followers.iterator(chunk_size=FAN_OUT_BATCH_SIZE),
+        post.author, Notification.POST, post,
+    )
+
+
+def notify_follow(follow):
+    notify([follow.author_id], follow.user, Notification.FOLLOW)
+
+
+def inbox_page(user, before=None):
+    """Страница уведомлений старше курсора ``before`` и курсор дальше."""
+    notifications = user.notifications.select_related('actor', 'post')
+    if before is not None:
+        notifications = notifications.filter(pk__lt=before)
+    page = list(notifications[:INBOX_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > INBOX_PAGE_SIZE:
+        page = page[:INBOX_PAGE_SIZE]
+        next_cursor = page[-1].pk
+    return page, next_cursor
+
+
+def mark_read(user, notifications):
+    ids = [n.pk for n in notifications if not n.is_read]
+    if ids:
+        Notification.objects.filter(pk__in=ids).update(is_read=True)
+        forget_unread([user.pk])
@@ -0,0 +1,181 @@
+"""Удаление пользователей, постов и групп небольшими пачками.
+
+Каскад ``on_delete=CASCADE`` у Django собирает все связанные строки в
+память и удаляет их одной транзакцией. Здесь связанные строки удаляются
+по диапазонам id, каждая пачка в своей короткой транзакции, поэтому
+блокировка записи SQLite не держится минутами. Лайки и строки индекса
+тегов снимаются со счетчиков ``like_count`` и ``post_count`` в той же
+транзакции, что и удаляются: каскад их бы просто стер. Удаленные пачки
+уже не вернутся, так что прерванную очистку достаточно запустить еще раз.
+"""
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from sorl.thumbnail import delete as delete_image
+
+from .activity import author_scope
+from .likes import like_counts
+from .models import (ActivityCommenter, ActivityDay, Comment, Follow, Like,
+                     Notification, Post, PostTag, Tag, User)
+from .tags import TOP_TAGS_CACHE_KEY
+
+PURGE_BATCH_SIZE = 500
+
+
+def _noop_progress(stage, done):
+    pass
+
+
+def delete_in_batches(queryset, batch_size=PURGE_BATCH_SIZE, pause=0,
+                      stage='', progress=_noop_progress, before_delete=None):
+    """Удаляет queryset пачками по возрастанию pk, возвращает число строк."""
+    done = 0
+    queryset = queryset.order_by('pk')
+    while True:
+        batch = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return done
+        with transaction.atomic():
+            chunk = queryset.filter(pk__range=(batch[0], batch[-1]))
+            if before_delete is not None:
+                before_delete(chunk)
+            chunk.delete()
+        done += len(batch)
+        progress(stage, done)
+        if pause:
+            time.sleep(pause)
+
+
+def delete_post_images(posts):
+    """Удаляет картинки постов и миниатюры sorl после коммита пачки."""
+    images = list(posts.exclude(image='').values_list('image', flat=True))
+
+    def delete_files():
+        for image in images:
+            delete_image(Post(image=image).image)
+
+    transaction.on_commit(delete_files)
+
+
+def uncount_likes(likes):
+    """Вычитает удаляемые лайки из ``like_count`` их постов."""
+    counts = Counter(likes.values_list('post_id', flat=True))
+    if counts:
+        like_counts.write([(pk, -count) for pk, count in counts.items()])
+
+
+def uncount_post_tags(post_tags):
+    """Вычитает удаляемые строки индекса из ``post_count`` тегов."""
+    by_count = {}
+    for tag_id, count in Counter(
+            post_tags.values_list('tag_id', flat=True)).items():
+        by_count.setdefault(count, []).append(tag_id)
+    for count, tag_ids in by_count.items():
+        Tag.objects.filter(pk__in=tag_ids).update(
+            post_count=F('post_count') - count)
+    if by_count:
+        transaction.on_commit(lambda: cache.delete(TOP_TAGS_CACHE_KEY))
+
+
+def purge_posts(posts, batch_size=PURGE_BATCH_SIZE, pause=0,
+                progress=_noop_progress):
+    """Удаляет посты вместе с комментариями, лайками и картинками."""
+    post_ids = posts.values('pk')
+    delete_in_batches(
+        Notification.objects.filter(post__in=post_ids),
+        batch_size, pause, 'notifications', progress,
+    )
+    delete_in_batches(
+        Comment.mentions.through.objects.filter(comment__post__in=post_ids),
+        batch_size, pause, 'comment mentions', progress,
+    )
+    delete_in_batches(
+        Comment.objects.filter(post__in=post_ids),
+        batch_size, pause, 'comments', progress,
+    )
+    delete_in_batches(
+        Like.objects.filter(post__in=post_ids),
+        batch_size, pause, 'likes', progress,
+    )
+    delete_in_batches(
+        PostTag.objects.filter(post__in=post_ids),
+        batch_size, pause, 'tags', progress,
+        before_delete=uncount_post_tags,
+    )
+    delete_in_batches(
+        Post.mentions.through.objects.filter(post__in=post_ids),
+        batch_size, pause, 'mentions', progress,
+    )
+    return delete_in_batches(
+        posts, batch_size, pause, 'posts', progress,
+        before_delete=delete_post_images,
+    )
+
+
+def purge_user(user, batch_size=PURGE_BATCH_SIZE, pause=0,
+               progress=_noop_progress):
+    """Удаляет пользователя со всеми постами, комментариями и подписками."""
+    if user.is_active:
+        User.objects.filter(pk=user.pk).update(is_active=False)
+    delete_in_batches(
+        Like.objects.filter(user=user),
+        batch_size, pause, 'likes', progress,
+        before_delete=uncount_likes,
+    )
+    delete_in_batches(
+        Post.mentions.through.objects.filter(user=user),
+        batch_size, pause, 'mentions', progress,
+    )
+    delete_in_batches(
+        Comment.mentions.through.objects.filter(
+            Q(user=user) | Q(comment__author=user)),
+        batch_size, pause, 'comment mentions', progress,
+    )
+    delete_in_batches(
+        Comment.objects.filter(author=user),
+        batch_size, pause, 'comments', progress,
+    )
+    delete_in_batches(
+        Follow.objects.filter(Q(user=user) | Q(author=user)),
+        batch_size, pause, 'follows', progress,
+    )
+    delete_in_batches(
+        Notification.objects.filter(Q(recipient=user) | Q(actor=user)),
+        batch_size, pause, 'notifications', progress,
+    )
+    delete_in_batches(
+        ActivityCommenter.objects.filter(
+            Q(user=user) | Q(scope=author_scope(user.pk))),
+        batch_size, pause, 'activity', progress,
+    )
+    delete_in_batches(
+        ActivityDay.objects.filter(scope=author_scope(user.pk)),
+        batch_size, pause, 'activity', progress,
+    )
+    purge_posts(user.posts.all(), batch_size, pause, progress)
+    user.delete()
+    progress('user', 1)
+
+
+def purge_group(group, batch_size=PURGE_BATCH_SIZE, pause=0,
+                progress=_noop_progress):
+    """Удаляет группу, отвязывая ее посты пачками."""
+    done = 0
+    posts = group.posts.order_by('pk')
+    while True:
+        batch = list(posts.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            Post.objects.filter(
+                group=group, pk__range=(batch[0], batch[-1])
+            ).update(group=None)
+        done += len(batch)
+        progress('posts', done)
+        if pause:
+            time.sleep(pause)
+    group.delete()
+    progress('group', 1)
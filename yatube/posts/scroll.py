@@ -0,0 +1,114 @@
+"""Следующие карточки ленты для бесконечной прокрутки.
+
+Вместо страницы целиком с base.html, шапкой и контекст-процессорами
+отдается только HTML карточек после курсора и курсор следующей порции.
+Курсор — (pub_date, pk) последней показанной карточки, поэтому выборка
+идет по индексу без OFFSET, а посты за курсором не сдвигаются, когда
+сверху появляются новые. Раз содержимое за курсором не меняется, готовый
+ответ кешируется по курсору; счетчики в карточках при этом отстают не
+больше чем на SCROLL_CACHE_TIMEOUT.
+"""
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+
+from .authors import attach_authors
+from .identity import get_group_or_404, user_id_or_404
+from .likes import attach_likes
+from .mentions import attach_mentions
+from .models import Post
+from .thumbnails import FEED_THUMBNAIL, attach_thumbnails
+from .util_func import COUNT_POST
+
+SCROLL_CACHE_TIMEOUT = 60 * 5
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Только ASCII-цифры и не длиннее, чем помещается в INTEGER SQLite
+CURSOR_RE = re.compile(r'([0-9]{1,18})\.([0-9]{1,18})')
+
+
+def encode_cursor(post):
+    delta = post.pub_date - EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 10 ** 6
+    return f'{micros + delta.microseconds}.{post.pk}'
+
+
+def decode_cursor(cursor):
+    """(pub_date, pk) из курсора или None для испорченного."""
+    match = CURSOR_RE.fullmatch(cursor)
+    if match is None:
+        return None
+    micros, pk = match.groups()
+    try:
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (OverflowError, ValueError):
+        return None
+
+
+def next_cursor(page):
+    """Курсор после последней карточки страницы или None."""
+    posts = list(page)
+    if not posts or not page.has_next():
+        return None
+    return encode_cursor(posts[-1])
+
+
+def posts_after(post_list, cursor):
+    pub_date, pk = cursor
+    posts = list(
+        post_list.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+        .order_by('-pub_date', '-pk')[:COUNT_POST + 1]
+    )
+    more = len(posts) > COUNT_POST
+    posts = posts[:COUNT_POST]
+    return posts, encode_cursor(posts[-1]) if more else None
+
+
+def more_response(request, scope, post_list):
+    cursor = decode_cursor(request.GET.get('cursor', ''))
+    if cursor is None:
+        return HttpResponse('Bad cursor', status=400)
+    key = f'scroll:{scope}:{request.GET["cursor"]}:{request.user.pk or 0}'
+    content = cache.get(key)
+    if content is None:
+        posts, after = posts_after(post_list, cursor)
+        attach_thumbnails(posts, *FEED_THUMBNAIL)
+        attach_likes(posts, request.user)
+        attach_authors(posts)
+        attach_mentions(posts)
+        html = render_to_string(
+            'posts/includes/cards.html', {'posts': posts}, request)
+        content = json.dumps({'html': html, 'cursor': after})
+        cache.set(key, content, SCROLL_CACHE_TIMEOUT)
+    response = HttpResponse(content, content_type='application/json')
+    # В карточках отметки «нравится» и токен CSRF читателя
+    visibility = 'private' if request.user.is_authenticated else 'public'
+    patch_cache_control(
+        response, max_age=SCROLL_CACHE_TIMEOUT, **{visibility: True})
+    return response
+
+
+def index_more(request):
+    return more_response(
+        request, 'site', Post.objects.feed(comment_count=True, author=False))
+
+
+def group_more(request, slug):
+    group = get_group_or_404(slug)
+    return more_response(
+        request, f'group:{group.pk}',
+        group.posts.feed(comment_count=True, author=False))
+
+
+def profile_more(request, username):
+    author_id = user_id_or_404(username)
+    return more_response(
+        request, f'author:{author_id}',
+        Post.objects.filter(author_id=author_id).feed(
+            comment_count=True, author=False))
@@ -0,0 +1,117 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .activity import record_comment, record_post
+from .authors import forget_author
+from .channels import group_posts, new_posts
+from .feeds import touch_feeds
+from .identity import (GROUP_CHOICES_CACHE_KEY, MISSING, forget_group,
+                       remember_group, remember_username)
+from .models import Comment, Group, Post, User
+from .streams import stream_event
+from .tags import set_tags
+
+
+@receiver([post_save, post_delete], sender=Group)
+def reset_group_choices(sender, **kwargs):
+    cache.delete(GROUP_CHOICES_CACHE_KEY)
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_slug(sender, instance, **kwargs):
+    instance.previous_slug = None
+    if instance.pk is not None:
+        instance.previous_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+def update_group_index(sender, instance, **kwargs):
+    previous = getattr(instance, 'previous_slug', None)
+    if previous and previous != instance.slug:
+        forget_group(previous)
+    remember_group(instance)
+
+
+@receiver(post_delete, sender=Group)
+def forget_group_slug(sender, instance, **kwargs):
+    forget_group(instance.slug)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, **kwargs):
+    instance.previous_group_id = None
+    if instance.pk is not None:
+        instance.previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Post)
+def reset_post_feeds(sender, instance, **kwargs):
+    touch_feeds(
+        instance.author_id,
+        instance.group_id,
+        getattr(instance, 'previous_group_id', None),
+    )
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(new_posts.publish, instance.pk))
+    if created and instance.group_id is not None:
+        transaction.on_commit(partial(
+            group_posts.publish, instance.group_id, stream_event(instance)))
+
+
+@receiver(post_save, sender=Post)
+def record_post_activity(sender, instance, created, **kwargs):
+    if created:
+        record_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_activity(sender, instance, created, **kwargs):
+    if created:
+        record_comment(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def untag_post(sender, instance, **kwargs):
+    # Каскад удалит строки индекса, но не уменьшит счетчики тегов
+    set_tags(instance, ())
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_username(sender, instance, update_fields=None,
+                               **kwargs):
+    instance.previous_username = None
+    if instance.pk is not None and (
+            update_fields is None or 'username' in update_fields):
+        instance.previous_username = User.objects.filter(
+            pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def update_username_index(sender, instance, created, **kwargs):
+    previous = getattr(instance, 'previous_username', None)
+    if previous and previous != instance.username:
+        remember_username(previous, MISSING)
+        remember_username(instance.username, instance.pk)
+    elif created:
+        remember_username(instance.username, instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_username(sender, instance, **kwargs):
+    remember_username(instance.username, MISSING)
+
+
+@receiver([post_save, post_delete], sender=User)
+def reset_author_snapshot(sender, instance, **kwargs):
+    forget_author(instance.pk)
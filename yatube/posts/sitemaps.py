@@ -0,0 +1,231 @@
+"""Карта сайта из файлов-шардов по 50 тысяч адресов.
+
+Шард покрывает фиксированный диапазон pk, поэтому его границы не
+сдвигаются при добавлении и удалении строк. Для каждого шарда сначала
+считается дешевый отпечаток по индексу pk, и шард переписывается только
+если отпечаток изменился. Строки читаются потоком через ``iterator()`` и
+пишутся во временный файл, который затем атомарно заменяет старый.
+
+Адреса профилей и групп строятся из username и slug, поэтому отпечаток
+их шардов включает еще и хеш этой колонки: иначе после переименования
+шард продолжал бы отдавать мертвый адрес.
+"""
+import hashlib
+import json
+import os
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Count, Max, Sum
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.utils._os import safe_join
+
+from .models import Group, Post, User
+
+SHARD_SIZE = 50000
+ITERATOR_CHUNK_SIZE = 2000
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URLSET_CLOSE = '</urlset>\n'
+
+
+class ShardKind:
+    """Вид шарда: какая модель делит pk и какие адреса из нее получаются."""
+    name = None
+    model = None
+    # Колонка, из которой строится адрес, если адрес не только из pk
+    url_field = None
+
+    def post_filter(self, low, high):
+        """Фильтр постов, от которых зависит lastmod адресов шарда."""
+        raise NotImplementedError
+
+    def fingerprint(self, low, high):
+        rows = self.model.objects.filter(pk__range=(low, high)).aggregate(
+            count=Count('pk'), pk_sum=Sum('pk'))
+        posts = Post.objects.filter(**self.post_filter(low, high)).aggregate(
+            count=Count('pk'), pk_sum=Sum('pk'), lastmod=Max('pub_date'))
+        lastmod = posts['lastmod'].isoformat() if posts['lastmod'] else None
+        return (
+            f"{rows['count']}:{rows['pk_sum']}:"
+            f"{posts['count']}:{posts['pk_sum']}:{lastmod}"
+            f"{self.url_digest(low, high)}"
+        ), lastmod
+
+    def url_digest(self, low, high):
+        if self.url_field is None:
+            return ''
+        digest = hashlib.md5()
+        values = (
+            self.model.objects.filter(pk__range=(low, high))
+            .order_by('pk').values_list(self.url_field, flat=True)
+        )
+        for value in values.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            digest.update(value.encode() + b'\n')
+        return ':' + digest.hexdigest()
+
+    def rows(self, low, high):
+        """Пары (путь, lastmod) по возрастанию pk."""
+        raise NotImplementedError
+
+    def max_pk(self):
+        return self.model.objects.aggregate(Max('pk'))['pk__max'] or 0
+
+
+class PostShards(ShardKind):
+    name = 'posts'
+    model = Post
+
+    def post_filter(self, low, high):
+        return {'pk__range': (low, high)}
+
+    def rows(self, low, high):
+        posts = (
+            Post.objects.filter(pk__range=(low, high))
+            .order_by('pk').values_list('pk', 'pub_date')
+        )
+        for pk, pub_date in posts.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+class ProfileShards(ShardKind):
+    name = 'profiles'
+    model = User
+    url_field = 'username'
+
+    def post_filter(self, low, high):
+        return {'author__pk__range': (low, high)}
+
+    def rows(self, low, high):
+        users = (
+            User.objects.filter(pk__range=(low, high), posts__isnull=False)
+            .order_by('pk').values_list('username')
+            .annotate(lastmod=Max('posts__pub_date'))
+        )
+        for username, lastmod in users.iterator(
+                chunk_size=ITERATOR_CHUNK_SIZE):
+            yield reverse('posts:profile', args=[username]), lastmod
+
+
+class GroupShards(ShardKind):
+    name = 'groups'
+    model = Group
+    url_field = 'slug'
+
+    def post_filter(self, low, high):
+        return {'group__pk__range': (low, high)}
+
+    def rows(self, low, high):
+        groups = (
+            Group.objects.filter(pk__range=(low, high))
+            .order_by('pk').values_list('slug')
+            .annotate(lastmod=Max('posts__pub_date'))
+        )
+        for slug, lastmod in groups.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            yield reverse('posts:group_list', args=[slug]), lastmod
+
+
+SHARD_KINDS = (PostShards(), ProfileShards(), GroupShards())
+
+
+def shard_name(kind, number):
+    return f'sitemap-{kind.name}-{number}.xml'
+
+
+def url_entry(base_url, path, lastmod):
+    entry = f'<url><loc>{escape(base_url + path)}</loc>'
+    if lastmod is not None:
+        entry += f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+    return entry + '</url>\n'
+
+
+def write_shard(path, base_url, rows):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as sitemap:
+        sitemap.write(URLSET_OPEN)
+        for url_path, lastmod in rows:
+            sitemap.write(url_entry(base_url, url_path, lastmod))
+        sitemap.write(URLSET_CLOSE)
+    os.replace(tmp_path, path)
+
+
+def write_index(root, base_url, manifest):
+    tmp_path = os.path.join(root, INDEX_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as index:
+        index.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex '
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for name, shard in sorted(manifest.items()):
+            loc = escape(base_url + reverse('posts:sitemap', args=[name]))
+            index.write(f'<sitemap><loc>{loc}</loc>')
+            if shard['lastmod']:
+                index.write(f"<lastmod>{shard['lastmod']}</lastmod>")
+            index.write('</sitemap>\n')
+        index.write('</sitemapindex>\n')
+    os.replace(tmp_path, os.path.join(root, INDEX_NAME))
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as manifest:
+            return json.load(manifest)
+    except FileNotFoundError:
+        return {}
+
+
+def build_sitemaps(root=None, base_url=None, force=False,
+                   progress=lambda name, written: None):
+    """Перестраивает изменившиеся шарды и индекс, возвращает их имена."""
+    root = root or settings.SITEMAP_ROOT
+    base_url = (base_url or settings.SITE_URL).rstrip('/')
+    os.makedirs(root, exist_ok=True)
+    old_manifest = load_manifest(root)
+    manifest = {}
+    written = []
+    for kind in SHARD_KINDS:
+        for number in range(kind.max_pk() // SHARD_SIZE + 1):
+            low, high = number * SHARD_SIZE, (number + 1) * SHARD_SIZE - 1
+            name = shard_name(kind, number)
+            fingerprint, lastmod = kind.fingerprint(low, high)
+            manifest[name] = {'fingerprint': fingerprint, 'lastmod': lastmod}
+            path = os.path.join(root, name)
+            if (
+                not force
+                and old_manifest.get(name) == manifest[name]
+                and os.path.exists(path)
+            ):
+                progress(name, False)
+                continue
+            write_shard(path, base_url, kind.rows(low, high))
+            written.append(name)
+            progress(name, True)
+    for name in set(old_manifest) - set(manifest):
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            os.remove(path)
+    write_index(root, base_url, manifest)
+    tmp_path = os.path.join(root, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(tmp_path, os.path.join(root, MANIFEST_NAME))
+    return written
+
+
+def sitemap(request, name=INDEX_NAME):
+    """Отдает готовый файл карты сайта из SITEMAP_ROOT."""
+    try:
+        path = safe_join(settings.SITEMAP_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    return FileResponse(open(path, 'rb'), content_type='application/xml')
@@ -0,0 +1,126 @@
+"""Server-Sent Events с новыми постами группы.
+
+Все читатели группы ждут одну тему ``channels.group_posts``, в которую
+сигнал сохранения поста публикует событие после коммита, поэтому число
+подключенных не умножает запросы к базе. Соединение держит поток
+сервера, так что поток закрывается через STREAM_DURATION, а EventSource
+сам переподключается с Last-Event-ID и дочитывает журнал темы. Потоков
+на процесс не больше настройки POST_STREAM_MAX, чтобы читатели не заняли
+все потоки сервера: лишним отвечает 503 с Retry-After.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from .channels import group_posts
+from .identity import get_group_or_404
+from .util_func import parse_id
+
+KEEPALIVE_INTERVAL = 15
+STREAM_DURATION = 5 * 60
+RETRY_MS = 3000
+STREAM_TEXT_LENGTH = 200
+MAX_STREAMS = 1000
+BUSY_RETRY_AFTER = 30
+
+
+class StreamSlots:
+    """Счетчик открытых потоков процесса с лимитом из настроек."""
+
+    def __init__(self):
+        self.open = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        limit = getattr(settings, 'POST_STREAM_MAX', MAX_STREAMS)
+        with self.lock:
+            if self.open >= limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.open -= 1
+
+
+stream_slots = StreamSlots()
+
+
+def stream_event(post):
+    return {
+        'id': post.pk,
+        'url': reverse('posts:post_detail', args=[post.pk]),
+        'author': post.author.username,
+        'text': post.text[:STREAM_TEXT_LENGTH],
+        'pub_date': post.pub_date.isoformat(),
+    }
+
+
+def format_event(seq, data):
+    return (
+        f'id: {seq}\nevent: post\n'
+        f'data: {json.dumps(data, ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+def events(topic, seq, duration=STREAM_DURATION):
+    yield f'retry: {RETRY_MS}\n\n'.encode()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        batch = topic.wait(seq, KEEPALIVE_INTERVAL)
+        if not batch:
+            # Комментарий не дает прокси закрыть тихое соединение
+            yield b': keepalive\n\n'
+            continue
+        for seq, data in batch:
+            yield format_event(seq, data)
+
+
+class HeldStream:
+    """События потока, которые при закрытии ответа освобождают место."""
+
+    def __init__(self, events, slots):
+        self.events = events
+        self.slots = slots
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        self.events.close()
+        slots, self.slots = self.slots, None
+        if slots is not None:
+            slots.release()
+
+
+def busy_response():
+    response = HttpResponse(
+        f'retry: {BUSY_RETRY_AFTER * 1000}\n\n', status=503,
+        content_type='text/event-stream')
+    response['Retry-After'] = BUSY_RETRY_AFTER
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def group_stream(request, slug):
+    group = get_group_or_404(slug)
+    if not stream_slots.acquire():
+        return busy_response()
+    # Поток живет минутами, а база ему больше не нужна
+    connection.close()
+    topic = group_posts.topic(group.pk)
+    seq = parse_id(request.META.get('HTTP_LAST_EVENT_ID'))
+    # Номер из прошлой жизни процесса считается устаревшим
+    seq = topic.last_seq if seq is None else min(seq, topic.last_seq)
+    response = StreamingHttpResponse(
+        HeldStream(events(topic, seq), stream_slots),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
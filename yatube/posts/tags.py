@@ -0,0 +1,85 @@
+"""Хештеги постов.
+
+Теги разбираются из текста при сохранении поста и хранятся в индексе
+PostTag, так что лента тега — это выборка по индексу, а не LIKE по
+текстам. При правке в индекс пишется только разница старого и нового
+набора, и на ту же разницу сдвигается ``Tag.post_count``. Поэтому список
+популярных тегов — это чтение нескольких строк по индексу ``post_count``
+без GROUP BY, а кеш этого списка сбрасывается только при изменении
+счетчиков.
+"""
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import TAG_MAX_LENGTH, PostTag, Tag
+
+TAG_RE = re.compile(r'(?<![\w#])#(\w+)')
+TOP_TAGS = 10
+TOP_TAGS_CACHE_KEY = 'tags:top'
+TOP_TAGS_CACHE_TIMEOUT = 60 * 60
+
+
+def normalize(name):
+    return name.lower()
+
+
+def parse_tags(text):
+    """Нормализованные теги текста; слишком длинные пропускаются."""
+    return {
+        normalize(name) for name in TAG_RE.findall(text)
+        if len(name) <= TAG_MAX_LENGTH
+    }
+
+
+def get_or_create_tags(names):
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        # Часть тегов мог только что создать параллельный запрос: такие
+        # строки пропускаются, а не откатывают вставку остальных
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update(
+            (tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+    return list(tags.values())
+
+
+def set_tags(post, names):
+    """Приводит индекс тегов поста к набору ``names`` по разнице."""
+    current = dict(post.post_tags.values_list('tag__name', 'tag_id'))
+    added = set(names) - set(current)
+    removed = [current[name] for name in set(current) - set(names)]
+    if not added and not removed:
+        return False
+    with transaction.atomic():
+        if removed:
+            post.post_tags.filter(tag_id__in=removed).delete()
+            Tag.objects.filter(pk__in=removed).update(
+                post_count=F('post_count') - 1)
+        if added:
+            tags = get_or_create_tags(added)
+            PostTag.objects.bulk_create(
+                [PostTag(post=post, tag=tag) for tag in tags])
+            Tag.objects.filter(pk__in=[tag.pk for tag in tags]).update(
+                post_count=F('post_count') + 1)
+    transaction.on_commit(lambda: cache.delete(TOP_TAGS_CACHE_KEY))
+    return True
+
+
+def update_post_tags(post):
+    return set_tags(post, parse_tags(post.text))
+
+
+def top_tags(limit=TOP_TAGS):
+    """Самые популярные теги с числом постов."""
+    tags = cache.get(TOP_TAGS_CACHE_KEY)
+    if tags is None:
+        tags = list(
+            Tag.objects.filter(post_count__gt=0)
+            .order_by('-post_count', 'name')[:TOP_TAGS]
+        )
+        cache.set(TOP_TAGS_CACHE_KEY, tags, TOP_TAGS_CACHE_TIMEOUT)
+    return tags[:limit]
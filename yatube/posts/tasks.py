@@ -0,0 +1,73 @@
+from core.taskqueue import task
+
+from .models import Group, Post, User
+from .notifications import notify_post
+from .purge import purge_group, purge_posts, purge_user
+from .thumbnails import FEED_THUMBNAIL, FOLLOW_THUMBNAIL, make_thumbnail
+
+
+@task(priority=-1)
+def make_post_thumbnails(post_id):
+    """Заранее создает миниатюры лент, чтобы их не делал запрос страницы."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    for geometry, options in (FEED_THUMBNAIL, FOLLOW_THUMBNAIL):
+        make_thumbnail(post.image, geometry, options)
+
+
+@task
+def notify_followers(post_id):
+    """Рассылает подписчикам автора уведомления о новом посте."""
+    post = Post.objects.filter(pk=post_id).select_related('author').first()
+    if post is not None:
+        notify_post(post)
+
+
+# Очистка идет пачками и может занять долго, повтор продолжит с места
+PURGE_TIMEOUT = 60 * 60
+
+
+def pk_ranges(queryset):
+    """pk из queryset отрезками [первый, последний] подряд идущих чисел.
+
+    Внутри отрезка все числа — выбранные pk, поэтому ``pk__range`` по нему
+    не заденет чужих строк, а сплошной выбор занимает пару чисел.
+    """
+    ranges = []
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    for pk in pks.iterator():
+        if ranges and ranges[-1][1] == pk - 1:
+            ranges[-1][1] = pk
+        else:
+            ranges.append([pk, pk])
+    return ranges
+
+
+def ranged(model, ranges):
+    for low, high in ranges:
+        yield model.objects.filter(pk__range=(low, high))
+
+
+def purge_each(querysets, purge):
+    for queryset in querysets:
+        obj = queryset.order_by('pk').first()
+        while obj is not None:
+            purge(obj)
+            obj = queryset.filter(pk__gt=obj.pk).order_by('pk').first()
+
+
+@task(timeout=PURGE_TIMEOUT)
+def purge_posts_task(ranges):
+    for posts in ranged(Post, ranges):
+        purge_posts(posts)
+
+
+@task(timeout=PURGE_TIMEOUT)
+def purge_groups_task(ranges):
+    purge_each(ranged(Group, ranges), purge_group)
+
+
+@task(timeout=PURGE_TIMEOUT)
+def purge_users_task(ranges):
+    purge_each(ranged(User, ranges), purge_user)
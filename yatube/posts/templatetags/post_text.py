@@ -0,0 +1,44 @@
+import re
+
+from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+from posts.mentions import MENTION_RE
+from posts.models import TAG_MAX_LENGTH
+from posts.tags import TAG_RE, normalize
+
+register = template.Library()
+
+TOKEN_RE = re.compile(f'{TAG_RE.pattern}|{MENTION_RE.pattern}')
+
+
+@register.filter(needs_autoescape=True)
+def linkify(obj, autoescape=True):
+    """Текст поста или комментария, где #теги ведут на ленты тегов, а
+    @имена — на профили.
+
+    Имена берутся из сохраненных упоминаний: ленты прикрепляют их
+    заранее через ``attach_mentions``, иначе они читаются из связи.
+    """
+    escape = conditional_escape if autoescape else str
+    text = obj.text
+    users = getattr(obj, 'mentioned_usernames', None)
+    if users is None:
+        users = {user.username for user in obj.mentions.all()}
+    parts = []
+    end = 0
+    for match in TOKEN_RE.finditer(text):
+        tag, username = match.groups()
+        if tag and len(tag) <= TAG_MAX_LENGTH:
+            url = reverse('posts:tag_list', args=[normalize(tag)])
+        elif username in users:
+            url = reverse('posts:profile', args=[username])
+        else:
+            continue
+        parts.append(escape(text[end:match.start()]))
+        parts.append(format_html('<a href="{}">{}</a>', url, match.group()))
+        end = match.end()
+    parts.append(escape(text[end:]))
+    return mark_safe(''.join(parts))
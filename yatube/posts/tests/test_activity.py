@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.activity import activity, author_scope, group_scope
+from posts.models import (ActivityCommenter, ActivityDay, Comment, Group,
+                          Post, User)
+
+
+class ActivityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def write(self):
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост')
+        Post.objects.create(author=self.author, text='Без группы')
+        for text in ('Раз', 'Два'):
+            Comment.objects.create(
+                post=post, author=self.reader, text=text)
+        Comment.objects.create(post=post, author=self.author, text='Ответ')
+
+    def snapshot(self):
+        return (
+            set(ActivityDay.objects.values_list(
+                'scope', 'day', 'posts', 'comments')),
+            set(ActivityCommenter.objects.values_list(
+                'scope', 'user_id', 'comments')),
+        )
+
+    def test_rollups_follow_writes(self):
+        """Посты и комментарии сразу сдвигают сводки группы и автора."""
+        self.write()
+        today = timezone.localdate()
+        group = activity(group_scope(self.group.pk))
+        self.assertEqual((group['posts'], group['comments']), (1, 3))
+        self.assertEqual(group['last_active'], today)
+        self.assertEqual(
+            [(c.user_info.username, c.comments)
+             for c in group['commenters']],
+            [('reader', 2), ('author', 1)],
+        )
+        author = activity(author_scope(self.author.pk))
+        self.assertEqual((author['posts'], author['comments']), (2, 3))
+
+    def test_backfill_matches_incremental(self):
+        """Пересчет с нуля дает те же строки, что и сигналы."""
+        self.write()
+        incremental = self.snapshot()
+        ActivityDay.objects.all().delete()
+        call_command('backfill_activity', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_pages_read_a_few_rows(self):
+        """Страница группы читает сводку парой запросов и показывает ее."""
+        self.write()
+        activity(group_scope(self.group.pk))
+        with self.assertNumQueries(2):
+            activity(group_scope(self.group.pk))
+        response = Client().get(
+            reverse('posts:group_list', args=[self.group.slug]))
+        self.assertContains(response, 'Постов: 1, комментариев: 3.')
+        self.assertContains(response, 'reader</a> (2)')
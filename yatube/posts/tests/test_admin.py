@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import KEYSET_VAR
+from posts.models import Post, Group, User, Comment
+
+
+class HighVolumeAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.admin, group=cls.group)
+            for i in range(105)
+        )
+        cls.post = Post.objects.order_by('pk').first()
+        Comment.objects.create(
+            post=cls.post, author=cls.admin, text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelist_query_count_does_not_grow(self):
+        """Changelist постов не делает запросов на каждую строку."""
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_keyset_navigation(self):
+        """Ссылка «Дальше» ведет на посты с меньшим pk."""
+        url = reverse('admin:posts_post_changelist')
+        response = self.client.get(url)
+        next_url = response.context['cl'].keyset_next_url
+        self.assertIn(f'{KEYSET_VAR}=', next_url)
+        response = self.client.get(url + next_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        result_list = response.context['cl'].result_list
+        self.assertEqual(len(result_list), 5)
+        self.assertIsNone(response.context['cl'].keyset_next_url)
+
+    def test_comment_search_by_author(self):
+        """Комментарии ищутся по @username автора."""
+        url = reverse('admin:posts_comment_changelist')
+        response = self.client.get(url, {'q': f'@{self.admin.username}'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+    def test_keyset_and_search_pages_do_not_count(self):
+        """Страницы ?after=<pk> и поиск обходятся без COUNT(*)."""
+        url = reverse('admin:posts_post_changelist')
+        for params in ({KEYSET_VAR: self.post.pk + 50},
+                       {'q': str(self.post.pk)},
+                       {'q': f'@{self.admin.username}'}):
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertFalse([
+                    query['sql'] for query in queries
+                    if 'COUNT(' in query['sql']
+                ])
+
+    def test_bad_keyset_and_search_terms(self):
+        """Не ASCII-цифры в ?after= и ?q= не ломают changelist."""
+        url = reverse('admin:posts_post_changelist')
+        for params in ({KEYSET_VAR: '²'}, {'q': '²'}, {'q': '9' * 30}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_search_does_not_scan_text(self):
+        """Слово ищется как имя автора, без LIKE по тексту постов."""
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'q': self.admin.username})
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+        self.assertFalse(
+            [query['sql'] for query in queries if 'LIKE' in query['sql']])
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.authors import get_authors
+from posts.models import Group, Post, User
+
+
+class AuthorSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{number}', first_name='Лев',
+                last_name=f'Толстой {number}')
+            for number in range(3)
+        ]
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        for author in cls.authors:
+            Post.objects.create(author=author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_batch_lookup(self):
+        """Авторы страницы читаются одним запросом, потом из кеша."""
+        ids = [author.pk for author in self.authors]
+        with self.assertNumQueries(1):
+            authors = get_authors(ids + [0])
+        self.assertEqual(
+            authors[ids[1]].full_name, 'Лев Толстой 1')
+        self.assertNotIn(0, authors)
+        with self.assertNumQueries(0):
+            get_authors(ids)
+
+    def test_user_change_invalidates(self):
+        """Смена имени пользователя сбрасывает его снимок."""
+        author = self.authors[0]
+        get_authors([author.pk])
+        author.first_name = 'Федор'
+        author.save()
+        self.assertEqual(
+            get_authors([author.pk])[author.pk].full_name, 'Федор Толстой 0')
+
+    def test_feed_does_not_join_users(self):
+        """Лента берет авторов из снимков, а не JOIN с auth_user."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        Client().get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertFalse(
+            [q['sql'] for q in queries if 'auth_user' in q['sql']])
+        self.assertContains(response, 'Лев Толстой 2')
+
+    def test_profile_by_username(self):
+        """Профиль находит автора по кешу имен и отдает 404 чужим именам."""
+        client = Client()
+        url = reverse('posts:profile', args=['author1'])
+        self.assertContains(client.get(url), 'Лев Толстой 1')
+        self.assertEqual(
+            client.get(reverse('posts:profile', args=['nobody'])).status_code,
+            404,
+        )
@@ -0,0 +1,85 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.comments import thread, thread_window
+from posts.models import (MAX_COMMENT_DEPTH, Comment, Notification, Post,
+                          User)
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.author, text=text, parent=parent)
+
+    def test_thread_is_one_range(self):
+        """Обсуждение читается одним запросом в порядке обхода дерева."""
+        first = self.comment('1')
+        second = self.comment('2')
+        reply = self.comment('1.1', first)
+        self.comment('2.1', second)
+        self.comment('1.1.1', reply)
+        self.comment('1.2', first)
+        with self.assertNumQueries(1):
+            texts = [c.text for c in thread(first)]
+        self.assertEqual(texts, ['1', '1.1', '1.1.1', '1.2'])
+
+    def test_window_of_threads(self):
+        """Окно верхних обсуждений с ответами и курсор следующего."""
+        roots = [self.comment(str(number)) for number in range(3)]
+        for root in roots:
+            self.comment(root.text + '.1', root)
+        with self.assertNumQueries(2):
+            comments, cursor = thread_window(self.post, size=2)
+        self.assertEqual(
+            [(c.text, c.depth) for c in comments],
+            [('0', 0), ('0.1', 1), ('1', 0), ('1.1', 1)],
+        )
+        comments, cursor = thread_window(self.post, cursor, size=2)
+        self.assertEqual([c.text for c in comments], ['2', '2.1'])
+        self.assertIsNone(cursor)
+
+    def test_depth_is_limited(self):
+        """Ответ глубже предела становится соседом родителя."""
+        comment = self.comment('0')
+        for level in range(1, MAX_COMMENT_DEPTH + 1):
+            comment = self.comment(str(level), comment)
+        self.assertEqual(comment.depth, MAX_COMMENT_DEPTH - 1)
+
+    def test_reply_view(self):
+        """Ответ через форму попадает в обсуждение и уведомляет автора."""
+        root = Comment.objects.create(
+            post=self.post, author=self.reader, text='Вопрос')
+        client = Client()
+        client.force_login(self.author)
+        client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ', 'parent': root.pk},
+        )
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual(reply.parent, root)
+        self.assertTrue(reply.path.startswith(root.path))
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.reader, kind=Notification.COMMENT).exists())
+        response = client.get(
+            reverse('posts:post_detail', args=[self.post.pk]),
+            {'reply_to': root.pk},
+        )
+        self.assertEqual(response.context['reply_to'], root)
+
+    def test_reply_to_bad_parent(self):
+        """Испорченный parent дает обычный комментарий, а не ошибку."""
+        client = Client()
+        client.force_login(self.author)
+        for parent in ('²', '9' * 30):
+            response = client.post(
+                reverse('posts:add_comment', args=[self.post.pk]),
+                {'text': parent, 'parent': parent},
+            )
+            self.assertEqual(response.status_code, 302)
+            self.assertIsNone(Comment.objects.get(text=parent).parent)
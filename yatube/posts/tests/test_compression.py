@@ -0,0 +1,74 @@
+import gzip
+import io
+import zlib
+
+from django.core.cache import cache
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from core.loaders import compact_whitespace
+from core.middleware import CompressionMiddleware
+
+
+class CompressionTest(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_page_is_gzipped(self):
+        """Страница сжимается, если клиент принимает gzip."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        html = gzip.decompress(response.content).decode()
+        self.assertIn('</html>', html)
+
+    def test_refused_encoding(self):
+        """gzip;q=0 отключает сжатие."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_chunks_are_flushed(self):
+        """Каждый кусок потока отдается сразу, а не после накопления."""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = CompressionMiddleware().process_response(
+            request, StreamingHttpResponse(iter([b'first', b'second'])))
+        chunks = iter(response.streaming_content)
+        first = next(chunks)
+        inflated = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(first)
+        self.assertEqual(inflated, b'first')
+        self.assertEqual(
+            gzip.decompress(first + b''.join(chunks)), b'firstsecond')
+
+    def test_compressed_types_are_skipped(self):
+        """Картинки отдаются без повторного сжатия и с Content-Length."""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        for response in (
+            FileResponse(io.BytesIO(b'x' * 1000), content_type='image/jpeg'),
+            StreamingHttpResponse(
+                iter([b'x' * 1000]), content_type='application/zip'),
+        ):
+            with self.subTest(content_type=response['Content-Type']):
+                response = CompressionMiddleware().process_response(
+                    request, response)
+                self.assertFalse(response.has_header('Content-Encoding'))
+        response = CompressionMiddleware().process_response(
+            request,
+            FileResponse(io.BytesIO(b'x' * 1000), content_type='image/png'))
+        self.assertEqual(response['Content-Length'], '1000')
+        for content_type in ('image/svg+xml', 'application/rss+xml'):
+            with self.subTest(content_type=content_type):
+                response = CompressionMiddleware().process_response(
+                    request, StreamingHttpResponse(
+                        iter([b'x' * 1000]), content_type=content_type))
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_compact_whitespace(self):
+        """Отступы убираются, содержимое <pre> остается."""
+        source = '<div>\n    <p>{{ a }}</p>\n\n  <pre>\n  x\n</pre>\n</div>'
+        self.assertEqual(
+            compact_whitespace(source),
+            '<div>\n<p>{{ a }}</p>\n<pre>\n  x\n</pre>\n</div>',
+        )
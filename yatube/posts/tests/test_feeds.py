@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_contain_posts(self):
+        """Ленты сайта, группы и автора отдают посты."""
+        urls = [
+            reverse('posts:feed'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_feed', args=[self.group.slug]),
+            reverse('posts:group_feed_atom', args=[self.group.slug]),
+            reverse('posts:profile_feed', args=[self.user.username]),
+            reverse('posts:profile_feed_atom', args=[self.user.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('Тестовый текст', response.content.decode())
+
+    def test_conditional_get(self):
+        """Повторный опрос без изменений получает 304 без запросов к базе,
+        новый пост в группе сбрасывает ETag."""
+        url = reverse('posts:group_feed', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('Новый пост', response.content.decode())
+
+    def test_unknown_group(self):
+        """Лента несуществующей группы отвечает 404."""
+        response = self.client.get(
+            reverse('posts:group_feed', args=['no-such-group']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_author_missing_from_snapshots(self):
+        """Лента автора, которого уже нет среди снимков, отвечает 404."""
+        with mock.patch('posts.feeds.get_authors', return_value={}):
+            response = self.client.get(
+                reverse('posts:profile_feed', args=[self.user.username]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,110 @@
+import warnings
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.identity import (IDENTITY_CACHE_TIMEOUT, NEGATIVE_CACHE_TIMEOUT,
+                            get_group_or_404, user_id_or_404, user_ids)
+from posts.models import Follow, Group, User
+
+
+class IdentityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_group_lookup_is_cached(self):
+        """Группа по slug достается из кеша без запросов."""
+        cache.clear()
+        with self.assertNumQueries(1):
+            get_group_or_404('group')
+        with self.assertNumQueries(0):
+            group = get_group_or_404('group')
+        self.assertEqual(group, self.group)
+        self.assertEqual(group.title, 'Группа')
+        self.assertEqual(group.description, 'Описание')
+
+    def test_missing_keys_are_cached(self):
+        """Несуществующие slug и username тоже помнятся."""
+        cache.clear()
+        for lookup, key in ((get_group_or_404, 'nope'),
+                            (user_id_or_404, 'nobody')):
+            with self.assertNumQueries(1), self.assertRaises(Http404):
+                lookup(key)
+            with self.assertNumQueries(0), self.assertRaises(Http404):
+                lookup(key)
+
+    def test_misses_are_written_in_one_batch_per_timeout(self):
+        """Промахи ``user_ids`` пишутся одним set_many на каждый срок."""
+        cache.clear()
+        with mock.patch.object(
+            cache, 'set_many', wraps=cache.set_many
+        ) as set_many:
+            user_ids({'author', 'reader', 'nobody', 'ghost'})
+        self.assertEqual(
+            {(len(records), timeout)
+             for (records, timeout), _ in set_many.call_args_list},
+            {(2, IDENTITY_CACHE_TIMEOUT), (2, NEGATIVE_CACHE_TIMEOUT)},
+        )
+
+    def test_keys_are_safe_for_memcached(self):
+        """Кириллица и пробелы в slug и имени не попадают в ключ кеша."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            with self.assertRaises(Http404):
+                get_group_or_404('Тестовый слаг')
+            with self.assertRaises(Http404):
+                user_id_or_404('Лев Толстой')
+
+    def test_group_changes_update_cache(self):
+        """Создание, переименование и удаление группы видны сразу."""
+        with self.assertRaises(Http404):
+            get_group_or_404('fresh')
+        group = Group.objects.create(title='Новая', slug='fresh')
+        self.assertEqual(get_group_or_404('fresh'), group)
+        group.slug = 'renamed'
+        group.title = 'Переименованная'
+        group.save()
+        with self.assertRaises(Http404):
+            get_group_or_404('fresh')
+        self.assertEqual(get_group_or_404('renamed').title, 'Переименованная')
+        group.delete()
+        with self.assertRaises(Http404):
+            get_group_or_404('renamed')
+
+    def test_follow_skips_user_lookup(self):
+        """Подписка по имени не ищет автора в таблице пользователей."""
+        user_id_or_404('author')
+        url = reverse('posts:profile_follow', args=['author'])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([
+            query['sql'] for query in queries
+            if '"auth_user"."username" =' in query['sql']
+        ])
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        self.client.get(reverse('posts:profile_unfollow', args=['author']))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_unknown_names_return_404(self):
+        for url in (reverse('posts:group_list', args=['nope']),
+                    reverse('posts:profile_follow', args=['nobody']),
+                    reverse('posts:group_feed', args=['nope'])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,80 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.likes import attach_likes, like, like_counts, unlike
+from posts.models import Like, Post, User
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=None)
+class LikeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=str(number))
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        like_counts.deltas.clear()
+        self.post = self.posts[0]
+
+    def tearDown(self):
+        like_counts.deltas.clear()
+
+    def test_like_is_unique(self):
+        """Повторный лайк не создает связь и не меняет счетчик."""
+        self.assertTrue(like(self.reader, self.post.pk))
+        self.assertFalse(like(self.reader, self.post.pk))
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(like_counts.pending([self.post.pk]), {
+            self.post.pk: 1})
+
+    def test_unlike(self):
+        """Снятый лайк возвращает счетчик назад."""
+        like(self.reader, self.post.pk)
+        self.assertTrue(unlike(self.reader, self.post.pk))
+        self.assertFalse(unlike(self.reader, self.post.pk))
+        self.assertEqual(like_counts.pending([self.post.pk]), {
+            self.post.pk: 0})
+
+    def test_flush_is_one_update(self):
+        """Приращения разных постов пишутся одним UPDATE."""
+        like(self.reader, self.posts[0].pk)
+        like(self.author, self.posts[0].pk)
+        like(self.reader, self.posts[1].pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(like_counts.flush(), 2)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'like_count', flat=True)),
+            [2, 1, 0],
+        )
+        self.assertEqual(like_counts.pending([self.post.pk]), {})
+
+    def test_pending_likes_are_shown(self):
+        """Карточка видит лайк до записи буфера и отметку читателя."""
+        like(self.reader, self.post.pk)
+        posts = list(Post.objects.order_by('pk'))
+        with self.assertNumQueries(1):
+            attach_likes(posts, self.reader)
+        self.assertEqual(
+            [(post.likes_total, post.liked) for post in posts],
+            [(1, True), (0, False), (0, False)],
+        )
+
+    def test_like_view_redirects_back(self):
+        """Лайк через форму возвращает на страницу, где его поставили."""
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:post_like', args=[self.post.pk])
+        response = client.post(url, {'next': reverse('posts:index')})
+        self.assertRedirects(response, reverse('posts:index'))
+        response = client.post(url, {'next': 'https://example.com/'})
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk]))
+        response = client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertContains(response, 'Нравится: 1')
+        self.assertTrue(response.context['post'].liked)
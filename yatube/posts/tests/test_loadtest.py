@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase
+
+from core.loadtest import (InProcessTransport, Scenarios, Session,
+                           loadtest_application, summarize)
+from core.middleware import LOCKED_HEADER
+from posts.models import Comment, Group, Post, User
+from yatube.wsgi import application
+
+
+class LoadTestTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('loader', password='secret-pass')
+        cls.group = Group.objects.create(
+            title='Группа', slug='load', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пост', group=cls.group)
+
+    def test_scenarios_run_in_process(self):
+        """Сессия входит через WSGI и проходит CSRF на записи."""
+        transport = InProcessTransport(application)
+        session = Session(transport)
+        self.assertTrue(session.login('loader', 'secret-pass'))
+        scenarios = Scenarios(Session(transport), session, {
+            'groups': [self.group.slug],
+            'usernames': [self.user.username],
+            'posts': [self.post.pk],
+        }, b'')
+        for name in ('index', 'group', 'profile', 'follow_index'):
+            status, _ = getattr(scenarios, name)()
+            self.assertEqual(status, 200, name)
+        status, _ = scenarios.add_comment()
+        self.assertEqual(status, 302)
+        self.assertTrue(Comment.objects.filter(post=self.post).exists())
+
+    def test_lock_is_marked_in_headers(self):
+        """Ответ на упавший по блокировке запрос несет X-Database-Locked."""
+        session = Session(InProcessTransport(loadtest_application()))
+        errors = (OperationalError('database is locked'), ValueError('x'))
+        for error in errors:
+            with self.subTest(error=error), \
+                    mock.patch('posts.views.top_tags', side_effect=error), \
+                    self.assertLogs('django.request', 'ERROR'):
+                status, headers = session.request('GET', '/')
+                self.assertEqual(status, 500)
+                self.assertEqual(
+                    LOCKED_HEADER.lower() in headers,
+                    isinstance(error, OperationalError),
+                )
+
+    def test_site_does_not_mark_locks(self):
+        """Приложение сайта без нагрузочного теста заголовок не ставит."""
+        session = Session(InProcessTransport(application))
+        with mock.patch('posts.views.top_tags', side_effect=OperationalError(
+                'database is locked')), \
+                self.assertLogs('django.request', 'ERROR'):
+            status, headers = session.request('GET', '/')
+        self.assertEqual(status, 500)
+        self.assertNotIn(LOCKED_HEADER.lower(), headers)
+
+    def test_summary_counts_locks(self):
+        """Отчет отделяет блокировки базы от прочих ошибок."""
+        samples = [
+            (100.0, 'index', 0.010, 'ok'),
+            (100.5, 'index', 0.030, 'error'),
+            (101.2, 'add_comment', 0.050, 'lock'),
+        ]
+        by_second, by_scenario = summarize(samples)
+        self.assertEqual([row['requests'] for row in by_second], [2, 1])
+        total = by_scenario[-1]
+        self.assertEqual(total['label'], 'total')
+        self.assertAlmostEqual(total['errors'], 1 / 3)
+        self.assertAlmostEqual(total['locks'], 1 / 3)
@@ -0,0 +1,67 @@
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.media_gc import collect_media_garbage
+from posts.models import Post, User
+from posts.tests.utils import SMALL_GIF, TempMediaMixin, small_gif
+from posts.thumbnails import FEED_THUMBNAIL, make_thumbnail
+
+GRACE = timedelta(hours=1)
+
+
+def age(path, seconds=2 * 60 * 60):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+class MediaGarbageTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='User')
+        self.kept = Post.objects.create(
+            author=user, text='Пост', image=small_gif('kept.gif'))
+        self.kept_thumbnail = make_thumbnail(self.kept.image, *FEED_THUMBNAIL)
+        removed = Post.objects.create(
+            author=user, text='Удаленный',
+            image=small_gif('removed.gif'))
+        self.removed_thumbnail = make_thumbnail(
+            removed.image, *FEED_THUMBNAIL)
+        self.removed_path = removed.image.path
+        removed.delete()
+        self.young_path = os.path.join(self.media_root, 'posts', 'young.gif')
+        with open(self.young_path, 'wb') as young:
+            young.write(SMALL_GIF)
+        for path in (self.kept.image.path, self.removed_path,
+                     self.media(self.kept_thumbnail),
+                     self.media(self.removed_thumbnail)):
+            age(path)
+
+    def tearDown(self):
+        # Хранилище sorl в кеше пережило бы удаление файлов
+        cache.clear()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def media(self, image_file):
+        return os.path.join(self.media_root, image_file.name)
+
+    def test_dry_run_deletes_nothing(self):
+        """Пробный проход только считает файлы."""
+        report = collect_media_garbage(GRACE, dry_run=True)
+        self.assertEqual(report['images_deleted'], 1)
+        self.assertEqual(report['thumbnails_deleted'], 1)
+        self.assertTrue(os.path.exists(self.removed_path))
+        self.assertTrue(os.path.exists(self.media(self.removed_thumbnail)))
+
+    def test_orphans_are_deleted(self):
+        """Удаляются только старые файлы без ссылок и их миниатюры."""
+        report = collect_media_garbage(GRACE)
+        self.assertEqual(report['images_young'], 1)
+        self.assertFalse(os.path.exists(self.removed_path))
+        self.assertFalse(os.path.exists(self.media(self.removed_thumbnail)))
+        self.assertTrue(os.path.exists(self.young_path))
+        self.assertTrue(os.path.exists(self.kept.image.path))
+        self.assertTrue(os.path.exists(self.media(self.kept_thumbnail)))
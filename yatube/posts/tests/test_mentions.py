@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.identity import user_ids
+from posts.models import Comment, Notification, Post, User
+
+
+class MentionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.fan = User.objects.create_user(username='fan.club')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def tearDown(self):
+        cache.clear()
+
+    def mentioned(self, kind=Notification.MENTION):
+        return set(Notification.objects.filter(kind=kind).values_list(
+            'recipient__username', flat=True))
+
+    def test_resolved_in_one_query(self):
+        """Все имена текста превращаются в id одним запросом."""
+        cache.clear()
+        with self.assertNumQueries(1):
+            ids = user_ids({'reader', 'fan.club', 'nobody'})
+        self.assertEqual(
+            ids, {'reader': self.reader.pk, 'fan.club': self.fan.pk})
+        with self.assertNumQueries(0):
+            user_ids({'reader', 'fan.club', 'nobody'})
+
+    def test_post_mentions_are_stored_and_notified_once(self):
+        """Упомянутые сохраняются, уведомление получают только новые."""
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Привет, @reader и @nobody! mail@reader.ru'},
+        )
+        post = Post.objects.get()
+        self.assertEqual(list(post.mentions.all()), [self.reader])
+        self.assertEqual(self.mentioned(), {'reader'})
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': '@reader, @fan.club.'},
+        )
+        self.assertEqual(
+            set(post.mentions.all()), {self.reader, self.fan})
+        self.assertEqual(Notification.objects.filter(
+            kind=Notification.MENTION).count(), 2)
+
+    def test_comment_mentions(self):
+        """Упоминание в комментарии связывается с комментарием."""
+        post = Post.objects.create(author=self.reader, text='Пост')
+        self.client.post(
+            reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Смотри, @fan.club'},
+        )
+        self.assertEqual(
+            list(Comment.objects.get().mentions.all()), [self.fan])
+        self.assertEqual(self.mentioned(), {'fan.club'})
+
+    def test_render_links_follow_username(self):
+        """Ссылки рисуются по текущим именам сохраненных упоминаний: после
+        переименования старое имя больше не ссылка."""
+        post = Post.objects.create(
+            author=self.author, text='@reader и @nobody')
+        post.mentions.add(self.reader)
+        url = reverse('posts:post_detail', args=[post.pk])
+        response = self.client.get(url)
+        self.assertContains(
+            response, f'href="{reverse("posts:profile", args=["reader"])}"')
+        self.assertNotContains(response, 'href="/profile/nobody/"')
+        self.reader.username = 'nobody'
+        self.reader.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'href="/profile/nobody/"')
+        self.assertNotContains(response, 'href="/profile/reader/"')
+
+    def test_render_does_not_resolve_usernames(self):
+        """Отрисовка не ищет имена текста в auth_user."""
+        post = Post.objects.create(
+            author=self.author, text='@reader и @nobody')
+        post.mentions.add(self.reader)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response, f'href="{reverse("posts:profile", args=["reader"])}"')
+        self.assertFalse([
+            query['sql'] for query in queries
+            if '"auth_user"."username" IN' in query['sql']
+        ])
@@ -1,6 +1,8 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from posts.models import Group, Post, User
+from posts.models import Comment, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -50,3 +52,37 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     post._meta.get_field(value).help_text, expected)
+
+
+class FeedQuerySetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='User')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост')
+        Post.objects.create(author=cls.user, text='Без комментариев')
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}')
+
+    def test_feed_counts_comments(self):
+        """feed() подтягивает автора и группу и считает комментарии."""
+        with self.assertNumQueries(1):
+            counts = {
+                post.text: (post.comment_count, post.author.username,
+                            post.group and post.group.slug)
+                for post in Post.objects.feed(comment_count=True)
+            }
+        self.assertEqual(counts, {
+            'Пост': (3, 'User', 'group'),
+            'Без комментариев': (0, 'User', None),
+        })
+
+    def test_count_skips_comment_subquery(self):
+        """COUNT(*) ленты не выполняет подзапрос комментариев."""
+        posts = Post.objects.feed(comment_count=True)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(posts.count(), 2)
+        self.assertNotIn('posts_comment', queries[0]['sql'])
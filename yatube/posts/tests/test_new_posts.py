@@ -0,0 +1,99 @@
+import threading
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.channels import Channel, new_posts
+from posts.models import Follow, Post, User
+
+
+class ChannelTests(TestCase):
+    def test_wait_wakes_on_publish(self):
+        """Ожидание заканчивается публикацией, а не таймаутом."""
+        channel = Channel()
+        timer = threading.Timer(0.05, channel.publish, args=[7])
+        timer.start()
+        self.assertTrue(channel.wait(5, timeout=5))
+        self.assertFalse(channel.wait(7, timeout=0.01))
+        timer.join()
+
+
+class NewPostsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.first = Post.objects.create(author=cls.author, text='Первый')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        new_posts.last_id = 0
+
+    def test_cursor_and_new_ids(self):
+        """Без курсора — последний id, с курсором — только новые посты."""
+        url = reverse('posts:index_new')
+        self.assertEqual(self.client.get(url).json(), {
+            'ids': [], 'count': 0, 'more': False, 'cursor': self.first.pk})
+        second = Post.objects.create(author=self.other, text='Второй')
+        self.assertEqual(
+            self.client.get(url, {'after': self.first.pk}).json(),
+            {'ids': [second.pk], 'count': 1, 'more': False,
+             'cursor': second.pk},
+        )
+        response = self.client.get(
+            reverse('posts:follow_new'), {'after': self.first.pk})
+        self.assertEqual(response.json()['ids'], [])
+
+    def test_bad_cursor(self):
+        """Не ASCII-цифры и числа за пределами INTEGER дают 400."""
+        for name in ('posts:index_new', 'posts:follow_new'):
+            for after in ('²', 'x', '9' * 30):
+                with self.subTest(name=name, after=after):
+                    response = self.client.get(
+                        reverse(name), {'after': after})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_long_poll_wakes_on_new_post(self):
+        """Долгий опрос ждет канал и перечитывает базу после пробуждения."""
+        created = []
+
+        def publish(after, timeout):
+            created.append(
+                Post.objects.create(author=self.author, text='Новый'))
+            return True
+
+        with mock.patch.object(new_posts, 'wait', side_effect=publish):
+            response = self.client.get(
+                reverse('posts:follow_new'),
+                {'after': self.first.pk, 'wait': 10},
+            )
+        self.assertEqual(response.json()['ids'], [created[0].pk])
+
+    def test_long_poll_timeout(self):
+        """По таймауту приходит пустой ответ с прежним курсором."""
+        response = self.client.get(
+            reverse('posts:index_new'),
+            {'after': self.first.pk, 'wait': 0.01},
+        )
+        self.assertEqual(response.json(), {
+            'ids': [], 'count': 0, 'more': False, 'cursor': self.first.pk})
+
+    def test_cursor_skips_foreign_posts(self):
+        """Чужой пост будит ожидание, но сдвигает курсор ленты подписок."""
+        def publish(after, timeout):
+            post = Post.objects.create(author=self.other, text='Чужой')
+            new_posts.publish(post.pk)
+            return True
+
+        with mock.patch.object(new_posts, 'wait', side_effect=publish):
+            response = self.client.get(
+                reverse('posts:follow_new'),
+                {'after': self.first.pk, 'wait': 10},
+            )
+        self.assertEqual(response.json()['ids'], [])
+        self.assertEqual(response.json()['cursor'], new_posts.last_id)
+        self.assertGreater(new_posts.last_id, self.first.pk)
@@ -0,0 +1,101 @@
+import threading
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.models import Task
+from core.taskqueue import work
+from posts.models import Follow, Notification, Post, User
+from posts.notifications import (INBOX_PAGE_SIZE, forget_unread,
+                                 unread_cache_key, unread_count,
+                                 unread_version)
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def create_post(self, text):
+        """Пост от автора; рассылку подписчикам выполняет воркер."""
+        self.author_client.post(reverse('posts:post_create'), {'text': text})
+        work('test', threading.Event(), burst=True)
+
+    def test_follow_post_and_comment_notify(self):
+        """Подписка, новый пост и комментарий создают уведомления."""
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author.username]))
+        self.create_post('Новый пост')
+        post = Post.objects.get()
+        self.reader_client.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': 'Ответ'})
+        self.assertEqual(
+            set(self.author.notifications.values_list('kind', flat=True)),
+            {Notification.FOLLOW, Notification.COMMENT},
+        )
+        self.assertEqual(
+            list(self.reader.notifications.values_list('kind', flat=True)),
+            [Notification.POST],
+        )
+
+    def test_unread_count_is_cached(self):
+        """Счетчик берется из кеша и сбрасывается после просмотра."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.create_post('Новый пост')
+        self.assertEqual(unread_count(self.reader), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.reader), 1)
+        self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(unread_count(self.reader), 0)
+
+    def test_inbox_cursor(self):
+        """Инбокс листается курсором по id."""
+        Notification.objects.bulk_create(
+            Notification(
+                recipient=self.reader, actor=self.author,
+                kind=Notification.FOLLOW)
+            for _ in range(INBOX_PAGE_SIZE + 5)
+        )
+        response = self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(
+            len(response.context['notifications']), INBOX_PAGE_SIZE)
+        cursor = response.context['next_cursor']
+        response = self.reader_client.get(
+            reverse('posts:notifications'), {'before': cursor})
+        self.assertEqual(len(response.context['notifications']), 5)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_bad_inbox_cursor(self):
+        """Курсор не из ASCII-цифр или за пределами INTEGER дает 400."""
+        for before in ('²', '9' * 30):
+            response = self.reader_client.get(
+                reverse('posts:notifications'), {'before': before})
+            self.assertEqual(response.status_code, 400)
+
+    def test_post_fan_out_is_queued(self):
+        """Рассылка о новом посте идет в очереди, а не в запросе автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'})
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(
+            Task.objects.get().name, 'posts.tasks.notify_followers')
+        work('test', threading.Event(), burst=True)
+        self.assertEqual(unread_count(self.reader), 1)
+
+    def test_count_from_before_write_is_not_read(self):
+        """Число, посчитанное до рассылки и записанное после нее, устарело."""
+        version = unread_version(self.reader.pk)
+        Notification.objects.create(
+            recipient=self.reader, actor=self.author,
+            kind=Notification.FOLLOW)
+        forget_unread([self.reader.pk])
+        # Медленный читатель кладет старое число под прежнюю версию
+        cache.set(unread_cache_key(self.reader.pk, version), 0)
+        self.assertEqual(unread_count(self.reader), 1)
@@ -0,0 +1,132 @@
+import json
+import threading
+from io import StringIO
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.models import Task
+from core.taskqueue import work
+from posts.models import Comment, Follow, Group, Like, Post, Tag, User
+from posts.purge import purge_group, purge_user
+from posts.tags import update_post_tags
+from posts.tasks import pk_ranges
+
+
+class PurgeTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.author, group=self.group)
+            for i in range(7)
+        ]
+        self.reader_post = Post.objects.create(
+            text='Пост читателя', author=self.reader, group=self.group)
+        Comment.objects.bulk_create(
+            Comment(post=self.reader_post, author=self.author, text='Текст')
+            for _ in range(5)
+        )
+        Comment.objects.create(
+            post=posts[0], author=self.reader, text='Ответ')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_purge_user(self):
+        """Пользователь удаляется вместе с постами, комментариями и
+        подписками, прогресс сообщается по пачкам."""
+        stages = []
+        purge_user(
+            self.author, batch_size=2,
+            progress=lambda stage, done: stages.append((stage, done)),
+        )
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Follow.objects.count(), 0)
+        self.assertIn(('posts', 7), stages)
+        self.assertEqual(stages[-1], ('user', 1))
+
+    def test_purge_user_keeps_counters(self):
+        """Лайки и теги удаленного пользователя снимаются со счетчиков."""
+        Like.objects.create(user=self.author, post=self.reader_post)
+        Post.objects.filter(pk=self.reader_post.pk).update(like_count=1)
+        for post in self.author.posts.all()[:3]:
+            post.text = '#общий'
+            update_post_tags(post)
+        self.reader_post.text = '#общий'
+        update_post_tags(self.reader_post)
+        purge_user(self.author, batch_size=2)
+        self.reader_post.refresh_from_db()
+        self.assertEqual(self.reader_post.like_count, 0)
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(Tag.objects.get(name='общий').post_count, 1)
+
+    def test_purge_group(self):
+        """Посты группы отвязываются и остаются на месте."""
+        purge_group(self.group, batch_size=3)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 8)
+
+    def test_purge_command(self):
+        """Команда purge удаляет посты по id."""
+        out = StringIO()
+        call_command('purge', post=[self.reader_post.pk], stdout=out)
+        self.assertFalse(Post.objects.filter(pk=self.reader_post.pk).exists())
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertIn('Готово', out.getvalue())
+
+    def purge_action(self, client, model, pks, select_across=False):
+        data = {'action': f'purge_selected_{model}s', '_selected_action': pks}
+        if select_across:
+            data['select_across'] = '1'
+        return client.post(
+            reverse(f'admin:posts_{model}_changelist'), data)
+
+    def test_admin_action_enqueues_task(self):
+        """Действие admin ставит задачу, которую выполняет воркер."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        client = Client()
+        client.force_login(admin)
+        Post.objects.create(text='Пост без группы', author=self.reader)
+        self.purge_action(
+            client, 'post', [self.reader_post.pk], select_across=True)
+        self.assertTrue(Post.objects.exists())
+        self.assertEqual(Task.objects.count(), 1)
+        # В аргументах только числа, а не сериализованный запрос
+        self.assertEqual(
+            json.loads(Task.objects.get().payload)['args'],
+            [pk_ranges(Post.objects.all())],
+        )
+        work('test', threading.Event(), burst=True)
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertFalse(Post.objects.exists())
+
+    def test_pk_ranges(self):
+        """Выбранные pk сворачиваются в отрезки подряд идущих чисел."""
+        pks = sorted(Post.objects.values_list('pk', flat=True))
+        Post.objects.filter(pk__in=pks[2:4]).delete()
+        first = pks[0]
+        self.assertEqual(
+            pk_ranges(Post.objects.exclude(pk=pks[-1])),
+            [[first, first + 1], [first + 4, pks[-2]]],
+        )
+
+    def test_admin_action_requires_delete_permission(self):
+        """Без права удаления действие недоступно."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.add(*Permission.objects.filter(
+            codename__in=['view_post', 'change_post']))
+        client = Client()
+        client.force_login(staff)
+        self.purge_action(client, 'post', [self.reader_post.pk])
+        self.assertFalse(Task.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.reader_post.pk).exists())
@@ -0,0 +1,193 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import urls
+from posts.models import Comment, Follow, Group, Notification, Post, User
+from posts.sitemaps import build_sitemaps
+from posts.tags import update_post_tags
+from posts.tests.utils import TempMediaMixin, small_gif
+from posts.thumbnails import (FEED_THUMBNAIL, FOLLOW_THUMBNAIL,
+                              attach_thumbnails)
+from posts.util_func import COUNT_POST
+
+# Сколько авторов, постов и комментариев добавляет второй замер
+EXTRA_AUTHORS = 3
+EXTRA_COMMENTS = 20
+EXTRA_NOTIFICATIONS = 30
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=None)
+class QueryCountTests(TempMediaMixin, TestCase):
+    """Число запросов страницы не растет вместе с данными.
+
+    Каждый адрес из posts/urls.py замеряется на маленьком наборе данных,
+    затем набор дорастает до полных страниц и длинных обсуждений, и
+    замер повторяется. Рост числа запросов означает N+1.
+    """
+
+    def setUp(self):
+        # Карта сайта отдается готовыми файлами, без них замер видел бы 404
+        sitemap_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, sitemap_root, ignore_errors=True)
+        sitemaps = override_settings(SITEMAP_ROOT=sitemap_root)
+        sitemaps.enable()
+        self.addCleanup(sitemaps.disable)
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост #тег @reader',
+            image=small_gif('post.gif'))
+        update_post_tags(self.post)
+        Post.objects.create(author=self.author, text='Пост без группы')
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий @author')
+        Notification.objects.create(
+            recipient=self.reader, actor=self.author,
+            kind=Notification.COMMENT, post=self.post)
+        self.guest = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.strangers = 0
+        build_sitemaps()
+
+    def grow(self):
+        """Дописывает полные страницы постов, комментарии и уведомления."""
+        authors = [self.author] + [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(EXTRA_AUTHORS)
+        ]
+        for author in authors:
+            Follow.objects.get_or_create(user=self.reader, author=author)
+            for number in range(COUNT_POST * 2):
+                update_post_tags(Post.objects.create(
+                    author=author,
+                    text=f'Пост {number} #тег #т{number} @reader',
+                    group=self.group if number % 2 else None,
+                    image=(
+                        small_gif(f'small{number}.gif') if number % 3 else ''),
+                ))
+        for number in range(EXTRA_COMMENTS):
+            Comment.objects.create(
+                post=self.post, author=authors[number % len(authors)],
+                text=f'Комментарий {number} @author',
+            )
+            Notification.objects.create(
+                recipient=self.reader, actor=authors[number % len(authors)],
+                kind=Notification.COMMENT, post=self.post,
+            )
+        for number in range(EXTRA_NOTIFICATIONS - EXTRA_COMMENTS):
+            Notification.objects.create(
+                recipient=self.reader, actor=authors[-1],
+                kind=Notification.FOLLOW,
+            )
+        build_sitemaps()
+
+    def stranger(self):
+        """Новый автор, чтобы подписка каждый раз создавалась заново."""
+        self.strangers += 1
+        return User.objects.create_user(
+            username=f'stranger{self.strangers}').username
+
+    def cases(self):
+        """Адрес -> (клиент, метод, данные, аргументы адреса)."""
+        post = {'post_id': self.post.pk}
+        group = {'slug': self.group.slug}
+        author = {'username': self.author.username}
+        # Курсор из будущего: за ним весь список, как у первой страницы
+        cursor = {'cursor': '9' * 16 + '.0'}
+        return {
+            'index': (self.guest, 'get', None, {}),
+            'index_more': (self.reader_client, 'get', cursor, {}),
+            'group_more': (self.guest, 'get', cursor, group),
+            'profile_more': (self.reader_client, 'get', cursor, author),
+            'group_list': (self.guest, 'get', None, group),
+            'group_stream': (self.guest, 'get', None, group),
+            'tag_list': (self.guest, 'get', None, {'name': 'тег'}),
+            'profile': (self.reader_client, 'get', None, author),
+            'sitemap_index': (self.guest, 'get', None, {}),
+            'sitemap': (
+                self.guest, 'get', None, {'name': 'sitemap-posts-0.xml'}),
+            'feed': (self.guest, 'get', None, {}),
+            'feed_atom': (self.guest, 'get', None, {}),
+            'group_feed': (self.guest, 'get', None, group),
+            'group_feed_atom': (self.guest, 'get', None, group),
+            'profile_feed': (self.guest, 'get', None, author),
+            'profile_feed_atom': (self.guest, 'get', None, author),
+            'post_detail': (self.reader_client, 'get', None, post),
+            'post_create': (
+                self.author_client, 'post', {'text': 'Новый пост'}, {}),
+            'post_edit': (
+                self.author_client, 'post',
+                {'text': 'Правка #тег @reader', 'group': self.group.pk},
+                post),
+            'post_like': (self.reader_client, 'post', {}, post),
+            'post_unlike': (self.reader_client, 'post', {}, post),
+            'add_comment': (
+                self.reader_client, 'post', {'text': 'Еще'}, post),
+            'follow_index': (self.reader_client, 'get', None, {}),
+            'index_new': (self.guest, 'get', {'after': self.post.pk}, {}),
+            'follow_new': (
+                self.reader_client, 'get', {'after': self.post.pk}, {}),
+            'notifications': (self.reader_client, 'get', None, {}),
+            'profile_follow': (
+                self.reader_client, 'get', None,
+                {'username': self.stranger()}),
+            'profile_unfollow': (
+                self.reader_client, 'get', None,
+                {'username': self.stranger()}),
+        }
+
+    def capture(self):
+        # Миниатюры создаются один раз, мерятся уже готовые страницы
+        for thumbnail in (FEED_THUMBNAIL, FOLLOW_THUMBNAIL):
+            attach_thumbnails(Post.objects.exclude(image=''), *thumbnail)
+        captured = {}
+        for name, (client, method, data, kwargs) in self.cases().items():
+            url = reverse(f'posts:{name}', kwargs=kwargs)
+            # Кеш страниц и счетчиков иначе прячет запросы второго замера
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method)(url, data)
+            self.assertLess(response.status_code, 500, url)
+            if name.startswith('sitemap'):
+                self.assertEqual(response.status_code, 200, url)
+            captured[name] = [query['sql'] for query in queries]
+        return captured
+
+    def test_every_url_is_covered(self):
+        """Для каждого адреса posts/urls.py есть замер."""
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(self.cases()))
+
+    def test_query_count_does_not_grow(self):
+        """На больших данных запросов не больше, чем на маленьких."""
+        small = self.capture()
+        self.grow()
+        large = self.capture()
+        for name in small:
+            with self.subTest(name=name):
+                # На одной странице пагинатор делает лишнюю проверку
+                # последней страницы, поэтому меньше запросов допустимо
+                if len(large[name]) > len(small[name]):
+                    self.fail(
+                        f'{name}: {len(small[name])} запросов на маленьких '
+                        f'данных и {len(large[name])} на больших:\n'
+                        + '\n'.join(
+                            f'{number}. {sql}'
+                            for number, sql in enumerate(large[name], 1))
+                    )
+
+    def tearDown(self):
+        cache.clear()
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+from posts.scroll import decode_cursor, encode_cursor
+from posts.util_func import COUNT_POST
+
+
+class ScrollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        now = timezone.now()
+        cls.posts = []
+        for number in range(COUNT_POST * 2 + 3):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}')
+            # Одинаковое время у соседей проверяет второй ключ курсора
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=number // 2))
+            cls.posts.append(post)
+
+    def setUp(self):
+        self.guest = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.get(pk=self.posts[5].pk)
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)), (post.pub_date, post.pk))
+        self.assertIsNone(decode_cursor('abc.1'))
+        for cursor in ('².1', '999999999999999999.1', '99999999999999999999.1',
+                       '1.99999999999999999999', '1.'):
+            self.assertIsNone(decode_cursor(cursor), cursor)
+
+    def test_scroll_matches_pages(self):
+        """Карточки по курсорам идут тем же порядком, что и страницы."""
+        response = self.guest.get(reverse('posts:group_list', args=['group']))
+        seen = [post.pk for post in response.context['page_obj']]
+        cursor = response.context['next_cursor']
+        url = reverse('posts:group_more', args=['group'])
+        while cursor:
+            data = self.guest.get(url, {'cursor': cursor}).json()
+            seen += [
+                int(line.split('/posts/')[1].split('/')[0])
+                for line in data['html'].splitlines()
+                if 'подробная информация' in line
+            ]
+            cursor = data['cursor']
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_fragment_is_cached(self):
+        """Ответ по курсору кешируется и не рендерит base.html."""
+        url = reverse('posts:index_more')
+        cursor = encode_cursor(Post.objects.order_by('-pub_date')[0])
+        response = self.guest.get(url, {'cursor': cursor})
+        self.assertNotIn('<html', response.json()['html'])
+        self.assertIn('max-age=300', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            cached = self.guest.get(url, {'cursor': cursor})
+        self.assertEqual(cached.content, response.content)
+        for bad in ('x', '².1', '999999999999999999.1'):
+            self.assertEqual(
+                self.guest.get(url, {'cursor': bad}).status_code, 400)
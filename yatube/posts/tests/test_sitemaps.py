@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.sitemaps import build_sitemaps
+
+SITEMAP_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(SITEMAP_ROOT=SITEMAP_ROOT, SITE_URL='http://testserver')
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_build_and_serve(self):
+        """Шарды содержат адреса постов, профилей и групп."""
+        build_sitemaps(force=True)
+        index = self.client.get(reverse('posts:sitemap_index'))
+        self.assertEqual(index.status_code, HTTPStatus.OK)
+        self.assertIn(b'sitemap-posts-0.xml', b''.join(index))
+        urls = {
+            'sitemap-posts-0.xml': reverse(
+                'posts:post_detail', args=[self.post.pk]),
+            'sitemap-profiles-0.xml': reverse(
+                'posts:profile', args=[self.user.username]),
+            'sitemap-groups-0.xml': reverse(
+                'posts:group_list', args=[self.group.slug]),
+        }
+        for name, url in urls.items():
+            with self.subTest(name=name):
+                response = self.client.get(
+                    reverse('posts:sitemap', args=[name]))
+                self.assertIn(
+                    f'http://testserver{url}'.encode(), b''.join(response))
+
+    def test_only_changed_shards_rewritten(self):
+        """Без изменений шарды не переписываются, новый пост обновляет
+        шарды постов, профилей и групп."""
+        build_sitemaps(force=True)
+        self.assertEqual(build_sitemaps(), [])
+        Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group)
+        self.assertEqual(
+            sorted(build_sitemaps()),
+            ['sitemap-groups-0.xml', 'sitemap-posts-0.xml',
+             'sitemap-profiles-0.xml'],
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(SITEMAP_ROOT, 'sitemap.xml')))
+
+    def test_renamed_urls_rewrite_shards(self):
+        """Новый slug или username переписывает шард с этим адресом."""
+        build_sitemaps(force=True)
+        group = Group.objects.create(title='Группа', slug='old-slug')
+        user = User.objects.create_user(username='old-name')
+        build_sitemaps()
+        group.slug = 'new-slug'
+        group.save()
+        user.username = 'new-name'
+        user.save()
+        self.assertEqual(
+            sorted(build_sitemaps()),
+            ['sitemap-groups-0.xml', 'sitemap-profiles-0.xml'],
+        )
+        response = self.client.get(
+            reverse('posts:sitemap', args=['sitemap-groups-0.xml']))
+        content = b''.join(response)
+        self.assertIn(b'/group/new-slug/', content)
+        self.assertNotIn(b'/group/old-slug/', content)
@@ -0,0 +1,94 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from core.storage import COMPRESSED_EXTENSIONS, brotli, compressed_path
+from core.views import STATIC_MAX_AGE, static_serve
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE = 'admin/css/base.css'
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT, STATICFILES_DIRS=())
+class StaticServeTests(SimpleTestCase):
+    """collectstatic сохраняет сжатые копии, static_serve их отдает."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name(SOURCE)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def get(self, path, **headers):
+        request = RequestFactory().get(f'/static/{path}', **headers)
+        return static_serve(request, path)
+
+    def test_gzip_copy_is_served(self):
+        """Клиенту с gzip отдается готовая .gz копия."""
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open(self.hashed) as original:
+            self.assertEqual(content, original.read())
+
+    @skipIf(brotli is None, 'brotli не установлен')
+    def test_brotli_is_preferred(self):
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_refused_and_identity_encodings(self):
+        """gzip;q=0 и identity получают исходный файл."""
+        for accept_encoding in ('gzip;q=0', 'identity', ''):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(
+                    self.hashed, HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_compressed_path_falls_back_to_gzip(self):
+        """Без .br копии br-клиент получает gzip."""
+        path = staticfiles_storage.path(self.hashed)
+        expected = 'br' if os.path.exists(path + '.br') else 'gzip'
+        self.assertEqual(
+            compressed_path(path, 'br, gzip'),
+            (path + COMPRESSED_EXTENSIONS[expected], expected),
+        )
+
+    def test_hashed_files_are_immutable(self):
+        """Файл с хешем в имени кешируется навсегда, исходный — нет."""
+        response = self.get(self.hashed)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(f'max-age={STATIC_MAX_AGE}', response['Cache-Control'])
+        response = self.get(SOURCE)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_not_modified(self):
+        """If-Modified-Since с текущей датой файла дает 304."""
+        response = self.get(self.hashed)
+        response = self.get(
+            self.hashed, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        response = self.get(
+            self.hashed, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_file(self):
+        for path in ('nope.css', '../settings.py'):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    self.get(path)
@@ -0,0 +1,121 @@
+import json
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import streams
+from posts.streams import StreamSlots
+from posts.channels import Hub, Topic, group_posts
+from posts.models import Group, Post, User
+
+
+class TopicTests(TestCase):
+    def test_readers_share_topic(self):
+        """Читатели одной группы ждут одну тему и получают одно событие."""
+        hub = Hub()
+        self.assertIs(hub.topic(1), hub.topic(1))
+        received = []
+        readers = [
+            threading.Thread(
+                target=lambda: received.append(hub.topic(1).wait(0, 5)))
+            for _ in range(3)
+        ]
+        for reader in readers:
+            reader.start()
+        hub.publish(1, 'пост')
+        for reader in readers:
+            reader.join()
+        self.assertEqual(received, [[(1, 'пост')]] * 3)
+        self.assertEqual(hub.topic(2).wait(0, 0.01), [])
+
+
+class GroupStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def stream(self, topic, **headers):
+        with mock.patch.object(streams.group_posts, 'topic',
+                               return_value=topic):
+            response = self.client.get(
+                reverse('posts:group_stream', args=[self.group.slug]),
+                **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.streaming_content
+
+    def test_stream_sends_new_posts(self):
+        """Поток отдает события, опубликованные после подключения."""
+        topic = Topic()
+        topic.publish({'id': 0})
+        content = self.stream(topic)
+        self.assertEqual(next(content), b'retry: 3000\n\n')
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Новый')
+        topic.publish(streams.stream_event(post))
+        lines = next(content).decode().splitlines()
+        self.assertEqual(lines[:2], ['id: 2', 'event: post'])
+        data = json.loads(lines[2][len('data: '):])
+        self.assertEqual(data['id'], post.pk)
+        self.assertEqual(data['author'], 'author')
+
+    def test_resume_from_last_event_id(self):
+        """Переподключение с Last-Event-ID дочитывает пропущенное."""
+        topic = Topic()
+        for number in range(3):
+            topic.publish({'id': number})
+        content = self.stream(topic, HTTP_LAST_EVENT_ID='1')
+        next(content)
+        self.assertTrue(next(content).startswith(b'id: 2\n'))
+        self.assertTrue(next(content).startswith(b'id: 3\n'))
+
+    @mock.patch.object(streams, 'KEEPALIVE_INTERVAL', 0.01)
+    def test_keepalive(self):
+        """Тихий поток шлет комментарий, чтобы соединение не закрылось."""
+        content = self.stream(Topic())
+        next(content)
+        self.assertEqual(next(content), b': keepalive\n\n')
+
+    @override_settings(POST_STREAM_MAX=1)
+    def test_streams_are_capped(self):
+        """Сверх лимита потоков отвечает 503, закрытый поток отдает место."""
+        url = reverse('posts:group_stream', args=[self.group.slug])
+        with mock.patch.object(streams, 'stream_slots', StreamSlots()):
+            held = self.client.get(url)
+            busy = self.client.get(url)
+            self.assertEqual(busy.status_code, 503)
+            self.assertEqual(
+                busy['Retry-After'], str(streams.BUSY_RETRY_AFTER))
+            self.assertEqual(
+                busy.content,
+                f'retry: {streams.BUSY_RETRY_AFTER * 1000}\n\n'.encode())
+            held.close()
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_bad_last_event_id(self):
+        """Испорченный Last-Event-ID читается как подключение заново."""
+        topic = Topic()
+        topic.publish({'id': 0})
+        content = self.stream(topic, HTTP_LAST_EVENT_ID='²')
+        next(content)
+        topic.publish({'id': 1})
+        self.assertTrue(next(content).startswith(b'id: 2\n'))
+
+    def test_post_create_publishes_after_commit(self):
+        """Пост из формы попадает в тему своей группы после коммита."""
+        topic = group_posts.topic(self.group.pk)
+        seq = topic.last_seq
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'В группу', 'group': self.group.pk},
+        )
+        self.assertEqual(topic.last_seq, seq)
+        for _, callback in connection.run_on_commit:
+            callback()
+        [(_, data)] = topic.since(seq)
+        self.assertEqual(data['text'], 'В группу')
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostTag, Tag, User
+from posts.tags import (get_or_create_tags, parse_tags, top_tags,
+                        update_post_tags)
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def tearDown(self):
+        cache.clear()
+
+    def counts(self):
+        return dict(Tag.objects.values_list('name', 'post_count'))
+
+    def test_parse_tags(self):
+        """Теги приводятся к нижнему регистру, якоря и ## не теги."""
+        self.assertEqual(
+            parse_tags('#Django и #джанго, ##нет, a#b, #django'),
+            {'django', 'джанго'},
+        )
+
+    def test_create_and_edit_diff(self):
+        """Правка меняет только разницу тегов и счетчики."""
+        self.client.post(
+            reverse('posts:post_create'), {'text': '#один #два'})
+        post = Post.objects.get()
+        self.assertEqual(self.counts(), {'один': 1, 'два': 1})
+        kept = PostTag.objects.get(tag__name='один').pk
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': '#один #три'},
+        )
+        self.assertEqual(self.counts(), {'один': 1, 'два': 0, 'три': 1})
+        self.assertEqual(PostTag.objects.get(tag__name='один').pk, kept)
+        post.delete()
+        self.assertEqual(self.counts(), {'один': 0, 'два': 0, 'три': 0})
+
+    def test_concurrently_created_tag_keeps_the_rest(self):
+        """Тег, который успел создать параллельный запрос, не отменяет
+        создание остальных новых тегов."""
+        Tag.objects.create(name='гонка')
+        stale = [Tag.objects.none()]
+        real_filter = Tag.objects.filter
+
+        def racing_filter(**lookup):
+            # Первая выборка еще не видит тег параллельного запроса
+            return stale.pop() if stale else real_filter(**lookup)
+
+        with mock.patch.object(Tag.objects, 'filter', racing_filter):
+            tags = get_or_create_tags({'гонка', 'новый', 'еще'})
+        self.assertEqual(
+            {tag.name for tag in tags}, {'гонка', 'новый', 'еще'})
+        self.assertTrue(all(tag.pk for tag in tags))
+        self.assertEqual(Tag.objects.count(), 3)
+
+    def test_unchanged_tags_are_one_query(self):
+        """Сохранение без изменения тегов — одна выборка индекса."""
+        post = Post.objects.create(author=self.author, text='#тег')
+        update_post_tags(post)
+        post.text = 'Другой текст #тег'
+        with self.assertNumQueries(1):
+            self.assertFalse(update_post_tags(post))
+
+    def test_tag_feed(self):
+        """Лента тега показывает только посты с тегом."""
+        tagged = Post.objects.create(author=self.author, text='#кот')
+        update_post_tags(tagged)
+        Post.objects.create(author=self.author, text='кот без тега')
+        response = self.client.get(
+            reverse('posts:tag_list', args=['Кот']))
+        self.assertEqual(list(response.context['page_obj']), [tagged])
+        self.assertContains(
+            response, f'href="{reverse("posts:tag_list", args=["кот"])}"')
+
+    def test_top_tags_are_cached(self):
+        """Популярные теги читаются из кеша и обновляются после правки."""
+        for text in ('#а #б', '#а', '#в'):
+            update_post_tags(Post.objects.create(
+                author=self.author, text=text))
+        self.assertEqual(
+            [(tag.name, tag.post_count) for tag in top_tags(2)],
+            [('а', 2), ('б', 1)],
+        )
+        with self.assertNumQueries(0):
+            top_tags()
+        update_post_tags(Post.objects.create(
+            author=self.author, text='#в #в'))
+        # Кеш сбрасывается после коммита, которого в TestCase нет
+        for _, callback in connection.run_on_commit:
+            callback()
+        self.assertEqual(
+            [(tag.name, tag.post_count) for tag in top_tags(2)],
+            [('а', 2), ('в', 2)],
+        )
@@ -0,0 +1,121 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.db import OperationalError
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core import taskqueue
+from core.taskqueue import claim, run_task, task, work
+from posts.models import User
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task(priority=5)
+def urgent(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def broken():
+    raise ValueError('сломано')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def drain(self):
+        work('test', threading.Event(), burst=True)
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом ставится один раз."""
+        first = remember.enqueue(1, key='once')
+        second = remember.enqueue(2, key='once')
+        self.assertEqual(first.pk, second.pk)
+        self.drain()
+        self.assertEqual(calls, [1])
+
+    def test_priority_order(self):
+        """Более приоритетная задача выполняется раньше."""
+        remember.enqueue('обычная')
+        urgent.enqueue('срочная')
+        self.drain()
+        self.assertEqual(calls, ['срочная', 'обычная'])
+
+    def test_delayed_task_waits(self):
+        """Отложенная задача не видна до своего времени."""
+        remember.enqueue('потом', delay=60)
+        self.assertIsNone(claim('test'))
+
+    def test_locked_status_write_is_retried(self):
+        """Блокировка базы при записи результата не оставляет задачу
+        заблокированной."""
+        queued = remember.enqueue('один раз')
+        update = QuerySet.update
+        failures = iter([OperationalError('database is locked')])
+
+        def flaky_update(queryset, **fields):
+            if fields.get('status') == Task.DONE:
+                error = next(failures, None)
+                if error is not None:
+                    raise error
+            return update(queryset, **fields)
+
+        with mock.patch.object(QuerySet, 'update', flaky_update), \
+                mock.patch.object(taskqueue, 'STATUS_RETRY_PAUSE', 0):
+            self.drain()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertIsNone(queued.locked_until)
+        self.assertEqual(calls, ['один раз'])
+
+    def test_retry_with_backoff_then_fail(self):
+        """Ошибка откладывает повтор, а после последней попытки — failed."""
+        queued = broken.enqueue()
+        run_task(claim('test'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertIn('сломано', queued.last_error)
+        self.assertGreater(queued.run_at, timezone.now())
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        run_task(claim('test'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    def test_visibility_timeout(self):
+        """Забранную задачу не видят другие воркеры, пока не истек срок."""
+        queued = remember.enqueue('один раз')
+        self.assertIsNotNone(claim('first'))
+        self.assertIsNone(claim('second'))
+        Task.objects.filter(pk=queued.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = claim('second')
+        self.assertEqual(reclaimed.locked_by, 'second')
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_password_reset_email_is_queued(self):
+        """Письмо сброса пароля отправляет воркер, а не запрос."""
+        User.objects.create_user(
+            username='user', email='user@example.com', password='pass')
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.drain()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Post, User
+from posts.tests.utils import TempMediaMixin, small_gif
+from posts.thumbnails import FEED_THUMBNAIL, attach_thumbnails
+
+
+class ThumbnailTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='User')
+        for number in range(5):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {number}',
+                image=small_gif(f'small{number}.gif'),
+            )
+        Post.objects.create(author=cls.user, text='Без картинки')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_page_is_resolved_in_one_query(self):
+        """Готовые миниатюры страницы читаются одним запросом."""
+        attach_thumbnails(list(Post.objects.all()), *FEED_THUMBNAIL)
+        cache.clear()
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            attach_thumbnails(posts, *FEED_THUMBNAIL)
+        with self.assertNumQueries(0):
+            attach_thumbnails(posts, *FEED_THUMBNAIL)
+        for post in posts:
+            with self.subTest(post=post.text):
+                if post.image:
+                    self.assertEqual(
+                        (post.thumbnail.width, post.thumbnail.height),
+                        (600, 375))
+                    self.assertTrue(
+                        post.thumbnail.url.startswith(settings.MEDIA_URL))
+                else:
+                    self.assertIsNone(post.thumbnail)
@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Post, User
+from posts.viewcount import view_counts
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=None)
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        view_counts.deltas.clear()
+        view_counts.oldest = None
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def tearDown(self):
+        view_counts.deltas.clear()
+        view_counts.oldest = None
+
+    def test_view_does_not_write(self):
+        """Просмотр не пишет в базу, но сразу виден на странице."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertFalse([
+            query['sql'] for query in queries
+            if not query['sql'].startswith('SELECT')
+        ])
+        self.assertContains(response, 'Просмотров: ~2')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 0)
+
+    def test_flush_and_lag(self):
+        """Запись буфера переносит просмотры в строку и сбрасывает lag."""
+        self.assertEqual(view_counts.lag(), 0)
+        for _ in range(3):
+            self.client.get(self.url)
+        self.assertGreater(view_counts.lag(), 0)
+        self.assertEqual(view_counts.flush(), 1)
+        self.assertEqual(view_counts.lag(), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 3)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Просмотров: ~4')
+
+    def test_full_buffer_wakes_flusher(self):
+        """Набранная пачка будит поток записи раньше интервала."""
+        view_counts.wakeup.clear()
+        for pk in range(counters.FLUSH_BATCH_SIZE):
+            view_counts.add(pk)
+        self.assertTrue(view_counts.wakeup.is_set())
+        view_counts.wakeup.clear()
+
+    def test_staff_sees_lag(self):
+        """Сотрудник видит, насколько отстает запись просмотров."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        response = client.get(self.url)
+        self.assertIn('views_lag', response.context)
+        self.assertNotIn(
+            'views_lag', self.client.get(self.url).context)
@@ -6,6 +6,7 @@ from django.urls import reverse
 from django.core.cache import cache
 
 from posts.models import Post, Group, User, Comment, Follow
+from posts.util_func import EstimatedCountPaginator
 
 
 class PostPagesTests(TestCase):
@@ -162,6 +163,62 @@ class PostPaginatorTests(TestCase):
             self.assertEqual(len(response.context['page_obj']), count_posts)
 
 
+class EstimatedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        for post_number in range(13):
+            Post.objects.create(text='Тестовый текст', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_elided_page_range(self):
+        """Навигация показывает окно страниц, а не все номера."""
+        paginator = EstimatedCountPaginator(range(1000), 10)
+        ellipsis = EstimatedCountPaginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50)),
+            [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100],
+        )
+
+    def test_stale_count_does_not_hide_posts(self):
+        """Устаревшее количество не обрезает страницы."""
+        posts = Post.objects.all()
+        EstimatedCountPaginator(posts, 10).get_page(1)
+        for post_number in range(10):
+            Post.objects.create(text='Новый текст', author=self.user)
+        page = EstimatedCountPaginator(posts, 10).get_page(3)
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_next())
+
+    def test_overestimated_count(self):
+        """Завышенная оценка не дает пустых страниц и ссылок на них."""
+        posts = Post.objects.all()
+        paginator = EstimatedCountPaginator(posts, 10)
+        paginator.count = 1000
+        page = paginator.get_page(2)
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_next())
+        self.assertEqual(list(paginator.get_elided_page_range(2)), [1, 2])
+        paginator = EstimatedCountPaginator(posts, 10)
+        paginator.count = 1000
+        page = paginator.get_page(50)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(EstimatedCountPaginator(posts, 10).count, 13)
+
+    def test_page_past_the_end(self):
+        """Номер за концом списка ведет на последнюю страницу."""
+        response = self.client.get(reverse('posts:index') + '?page=99')
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual(len(page_obj), 3)
+        response = self.client.get(
+            reverse('posts:index') + '?page=99999999999999999999')
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+
 class CommentTest(TestCase):
     @classmethod
     def setUpClass(cls):
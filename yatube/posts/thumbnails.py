@@ -0,0 +1,111 @@
+"""Миниатюры для целой страницы постов за одно обращение к хранилищу.
+
+Тег ``{% thumbnail %}`` ищет каждую миниатюру в key-value хранилище sorl
+отдельно. Здесь имена миниатюр всех постов страницы считаются заранее и
+читаются одним ``get_many`` из кеша, а промахи добираются одним запросом
+к таблице sorl. Найденные миниатюры прикрепляются к постам как
+``post.thumbnail``, так что шаблону остается только вывести url и размер.
+Миниатюры, которых еще нет, создаются обычным ``get_thumbnail``.
+"""
+import logging
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+# Геометрия и опции миниатюр в лентах
+FEED_THUMBNAIL = ('600x375', {'crop': 'center', 'upscale': True})
+FOLLOW_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+
+logger = logging.getLogger(__name__)
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """Хранилище sorl в кеше и базе с чтением пачкой."""
+
+    def _get_many_raw(self, keys):
+        values = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            found = dict(
+                KVStoreModel.objects.filter(key__in=missing)
+                .values_list('key', 'value')
+            )
+            fetched = {
+                key: found.get(key, cached_db_kvstore.EMPTY_VALUE)
+                for key in missing
+            }
+            # Отсутствие тоже кешируется, как и в _get_raw
+            self.cache.set_many(fetched, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(fetched)
+        return {
+            key: value for key, value in values.items()
+            if value != cached_db_kvstore.EMPTY_VALUE
+        }
+
+    def get_many(self, image_files):
+        """Словарь ключ -> ImageFile для найденных в хранилище файлов."""
+        keys = {add_prefix(image_file.key): image_file.key
+                for image_file in image_files}
+        return {
+            keys[raw_key]: deserialize_image_file(value)
+            for raw_key, value in self._get_many_raw(list(keys)).items()
+        }
+
+
+def thumbnail_options(source, options):
+    """Опции так же, как их дополняет ThumbnailBackend.get_thumbnail."""
+    backend = default.backend
+    options = dict(options)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def make_thumbnail(image, geometry, options):
+    """Создает миниатюру; битая картинка, как и в теге, дает None."""
+    try:
+        thumbnail = get_thumbnail(image, geometry, **options)
+    except Exception:
+        if settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Thumbnail for %s failed', image)
+        return None
+    # Без размера sorl возвращает миниатюру, которую не удалось создать
+    return thumbnail if thumbnail.size else None
+
+
+def attach_thumbnails(posts, geometry, options):
+    """Прикрепляет к постам ``thumbnail``: ImageFile или None."""
+    wanted = {}
+    for post in posts:
+        post.thumbnail = None
+        if not post.image:
+            continue
+        source = ImageFile(post.image)
+        thumbnail = ImageFile(
+            default.backend._get_thumbnail_filename(
+                source, geometry, thumbnail_options(source, options)),
+            default.storage,
+        )
+        wanted.setdefault(thumbnail.key, (thumbnail, []))[1].append(post)
+    if not wanted:
+        return posts
+    found = default.kvstore.get_many(
+        thumbnail for thumbnail, _ in wanted.values())
+    for key, (_, key_posts) in wanted.items():
+        thumbnail = found.get(key) or make_thumbnail(
+            key_posts[0].image, geometry, options)
+        for post in key_posts:
+            post.thumbnail = thumbnail
+    return posts
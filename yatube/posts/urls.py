@@ -1,22 +1,69 @@
-from django.urls import path
+from django.urls import path, re_path
 
-from . import views
+from . import feeds, scroll, sitemaps, streams, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('more/', scroll.index_more, name='index_more'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/more/', scroll.group_more, name='group_more'),
+    path(
+        'group/<slug:slug>/stream/',
+        streams.group_stream,
+        name='group_stream'
+    ),
+    path('tag/<str:name>/', views.tag_posts, name='tag_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/more/',
+        scroll.profile_more,
+        name='profile_more'
+    ),
+    path('sitemap.xml', sitemaps.sitemap, name='sitemap_index'),
+    # Файл карты сайта описывает только адреса не выше своего пути
+    re_path(
+        r'^(?P<name>sitemap-[a-z]+-\d+\.xml)$',
+        sitemaps.sitemap,
+        name='sitemap'
+    ),
+    path('feed/', feeds.site_rss, name='feed'),
+    path('feed/atom/', feeds.site_atom, name='feed_atom'),
+    path('group/<slug:slug>/feed/', feeds.group_rss, name='group_feed'),
+    path(
+        'group/<slug:slug>/feed/atom/',
+        feeds.group_atom,
+        name='group_feed_atom'
+    ),
+    path(
+        'profile/<str:username>/feed/',
+        feeds.author_rss,
+        name='profile_feed'
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.author_atom,
+        name='profile_feed_atom'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
+    path(
+        'posts/<int:post_id>/unlike/',
+        views.post_unlike,
+        name='post_unlike'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('new/', views.index_new, name='index_new'),
+    path('follow/new/', views.follow_new, name='follow_new'),
+    path('notifications/', views.notifications, name='notifications'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,11 +1,236 @@
-from django.core.paginator import Paginator
+import hashlib
+import re
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import DatabaseError, connection
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
 
 
 COUNT_POST = 10
+COUNT_REFRESH_AFTER = 60 * 5
+COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+# str.isdigit пропускает и '²', а int() такие цифры не читает
+ID_RE = re.compile(r'[0-9]{1,19}')
+MAX_ID = 2 ** 63 - 1
 
 
 def paginator(post_list, request):
-    paginator = Paginator(post_list, COUNT_POST)
+    paginator = EstimatedCountPaginator(post_list, COUNT_POST)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.elided_page_range = list(
+        paginator.get_elided_page_range(page_obj.number))
     return page_obj
+
+
+def parse_id(value):
+    """id из параметра запроса или None, если это не INTEGER SQLite."""
+    if value is None or ID_RE.fullmatch(value) is None:
+        return None
+    value = int(value)
+    return value if value <= MAX_ID else None
+
+
+def table_row_estimate(model):
+    """Число строк таблицы по статистике sqlite_stat1 (после ANALYZE)."""
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master "
+            "WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if cursor.fetchone() is None:
+            return None
+        try:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s',
+                [model._meta.db_table],
+            )
+        except DatabaseError:
+            return None
+        rows = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+    return max(rows) if rows else None
+
+
+def count_cache_key(queryset):
+    """Ключ кеша для количества объектов queryset или None для пустого."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return None
+    return 'count:' + hashlib.md5(sql.encode()).hexdigest()
+
+
+def remember_count(queryset, count):
+    """Кладет точное количество объектов queryset в кеш оценок."""
+    key = count_cache_key(queryset)
+    if key is not None:
+        cache.set(
+            key, (count, time.time() + COUNT_REFRESH_AFTER),
+            COUNT_CACHE_TIMEOUT,
+        )
+
+
+def exact_count(queryset):
+    """Точный COUNT(*), который сразу кладется в кеш оценок."""
+    count = queryset.count()
+    remember_count(queryset, count)
+    return count
+
+
+def _count_estimate(queryset):
+    query = queryset.query
+    if not query.where and not query.distinct and query.can_filter():
+        count = table_row_estimate(queryset.model)
+        if count is not None:
+            return count
+    return queryset.count()
+
+
+def _refresh_count(queryset, key):
+    try:
+        cache.set(
+            key,
+            (_count_estimate(queryset), time.time() + COUNT_REFRESH_AFTER),
+            COUNT_CACHE_TIMEOUT,
+        )
+    finally:
+        cache.delete(key + ':refresh')
+        connection.close()
+
+
+def estimated_count(queryset):
+    """Приблизительное количество объектов без COUNT(*) на каждый запрос.
+
+    Для нефильтрованной таблицы берется статистика sqlite_stat1, для
+    остальных запросов точный COUNT кешируется. Устаревшее значение
+    отдается сразу, а пересчитывается в фоновом потоке.
+    """
+    key = count_cache_key(queryset)
+    if key is None:
+        return 0
+    cached = cache.get(key)
+    if cached is None:
+        count = _count_estimate(queryset)
+        cache.set(
+            key, (count, time.time() + COUNT_REFRESH_AFTER),
+            COUNT_CACHE_TIMEOUT,
+        )
+        return count
+    count, refresh_at = cached
+    if refresh_at < time.time() and cache.add(
+            key + ':refresh', True, COUNT_REFRESH_AFTER):
+        threading.Thread(
+            target=_refresh_count, args=(queryset.all(), key), daemon=True,
+        ).start()
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не делает точный COUNT(*) на каждый запрос.
+
+    Общее число объектов приблизительное и нужно только для ссылок
+    навигации. Неполная страница значит, что она последняя, и оценка
+    заменяется точным числом. На последней по оценке полной странице
+    наличие следующей проверяется выборкой одной строки, а пустая
+    страница пересчитывает количество точно.
+    """
+    ELLIPSIS = '…'
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return estimated_count(self.object_list)
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        # Оценка может отставать от таблицы, но не вдвое; дальше OFFSET
+        # был бы бессмысленным, а за 2**63 его не примет и SQLite
+        if number > 2 * self.num_pages:
+            raise EmptyPage('That page contains no results')
+        return number
+
+    def _has_rows(self, offset):
+        return len(self.object_list[offset:offset + 1]) > 0
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        object_list = self.object_list[bottom:top]
+        found = len(object_list)
+        if number > 1 and not found:
+            raise EmptyPage('That page contains no results')
+        if number >= self.num_pages or found < self.per_page:
+            if found == self.per_page:
+                self.num_pages = number + self._has_rows(top)
+            else:
+                # После неполной страницы ничего нет, какой бы ни была оценка
+                self.num_pages = number
+                if self.count != bottom + found:
+                    self.count = bottom + found
+                    if isinstance(self.object_list, QuerySet):
+                        remember_count(self.object_list, self.count)
+        return self._get_page(object_list, number, self)
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            if isinstance(self.object_list, QuerySet):
+                self.count = exact_count(self.object_list)
+            else:
+                self.count = len(self.object_list)
+            self.__dict__.pop('num_pages', None)
+            return self.page(self.num_pages)
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг текущей и по краям, пропуски — ELLIPSIS."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(
+                self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+class ProbeCountPaginator(EstimatedCountPaginator):
+    """Paginator, который вообще не считает строки.
+
+    Вместо количества выбирается не больше одной страницы и еще одной
+    строки по индексу: этого хватает, чтобы знать, есть ли следующая
+    страница. Нужен для выборок, у которых COUNT на большой таблице
+    каждый раз свой: страниц ``?after=<pk>`` и поиска.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return len(self.object_list.values_list('pk', flat=True)[
+                :self.per_page + 1])
+        return super().count
@@ -0,0 +1,19 @@
+"""Счетчик просмотров постов.
+
+Просмотр страницы поста не пишет в базу: приращение уходит в буфер
+``view_counts``, который фоновый поток переносит в ``Post.view_count``
+пачками. Страница показывает примерное число — записанное в строке поста
+плюс еще не записанное в этом процессе.
+"""
+from .counters import CounterBuffer
+from .models import Post
+
+view_counts = CounterBuffer(Post, 'view_count')
+
+
+def count_view(post):
+    """Учитывает просмотр и прикрепляет к посту ``views_total``."""
+    view_counts.add(post.pk)
+    post.views_total = (
+        post.view_count + view_counts.pending([post.pk]).get(post.pk, 0))
+    return post
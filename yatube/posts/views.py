@@ -1,58 +1,134 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
 
 
-from .util_func import paginator
-from .models import Post, Group, User, Follow
+from .activity import activity, author_scope, group_scope
+from .authors import attach_authors, get_authors
+from .channels import new_posts
+from .comments import thread_window
+from .scroll import next_cursor
+from .likes import attach_likes, like, unlike
+from .identity import get_group_or_404, user_id_or_404
+from .mentions import attach_mentions, update_mentions
+from .viewcount import count_view, view_counts
+from .util_func import paginator, parse_id
+from .models import Post, Tag, Follow
 from .forms import PostForm, CommentForm
+from .notifications import (inbox_page, mark_read, notify_comment,
+                            notify_follow)
+from .tags import normalize, top_tags, update_post_tags
+from .tasks import make_post_thumbnails, notify_followers
+from .thumbnails import FEED_THUMBNAIL, FOLLOW_THUMBNAIL, attach_thumbnails
+
+# Больше id клиенту не нужно, а число сверх него — просто «50+»
+NEW_POSTS_LIMIT = 50
+LONG_POLL_TIMEOUT = 25
 
 
 def index(request):
-    post_list = Post.objects.select_related('author')
+    post_list = Post.objects.feed(comment_count=True, author=False)
     page_obj = paginator(post_list, request)
+    attach_thumbnails(page_obj, *FEED_THUMBNAIL)
+    attach_likes(page_obj, request.user)
+    attach_authors(page_obj)
+    attach_mentions(page_obj)
     context = {
         'page_obj': page_obj,
+        'top_tags': top_tags(),
+        'next_cursor': next_cursor(page_obj),
+        'more_url': reverse('posts:index_more'),
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = get_group_or_404(slug)
+    post_list = group.posts.feed(comment_count=True, author=False)
     page_obj = paginator(post_list, request)
+    attach_thumbnails(page_obj, *FEED_THUMBNAIL)
+    attach_likes(page_obj, request.user)
+    attach_authors(page_obj)
+    attach_mentions(page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'activity': activity(group_scope(group.pk)),
+        'next_cursor': next_cursor(page_obj),
+        'more_url': reverse('posts:group_more', args=[slug]),
     }
     return render(request, 'posts/group_list.html', context, slug)
 
 
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=normalize(name))
+    post_list = tag.posts.feed(comment_count=True, author=False)
+    page_obj = paginator(post_list, request)
+    attach_thumbnails(page_obj, *FEED_THUMBNAIL)
+    attach_likes(page_obj, request.user)
+    attach_authors(page_obj)
+    attach_mentions(page_obj)
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/tag_list.html', context)
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author_id = user_id_or_404(username)
+    author = get_authors([author_id]).get(author_id)
+    if author is None:
+        raise Http404('No User matches the given query.')
+    post_list = Post.objects.filter(author_id=author.pk).feed(
+        comment_count=True, author=False)
     page_obj = paginator(post_list, request)
+    attach_thumbnails(page_obj, *FEED_THUMBNAIL)
+    attach_likes(page_obj, request.user)
+    attach_authors(page_obj)
+    attach_mentions(page_obj)
     following = (
         request.user.is_authenticated
-        and author.following.filter(user=request.user).exists()
+        and Follow.objects.filter(
+            user=request.user, author_id=author.pk).exists()
     )
     context = {
-        'author': author,
+        'author': author.as_user(),
         'page_obj': page_obj,
         'posts': post_list,
-        'following': following
+        'following': following,
+        'activity': activity(author_scope(author.pk)),
+        'next_cursor': next_cursor(page_obj),
+        'more_url': reverse('posts:profile_more', args=[username]),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.feed(author=False), pk=post_id)
+    attach_likes([post], request.user)
+    count_view(post)
     form = CommentForm()
-    comments = post.comments.select_related('author').all()
+    after = request.GET.get('threads_after', '')
+    comments, next_threads = thread_window(
+        post, after if after.isdigit() else None)
+    attach_authors([post, *comments])
+    attach_mentions([post, *comments])
+    reply_to = request.GET.get('reply_to')
+    reply_to = next((c for c in comments if str(c.pk) == reply_to), None)
     context = {
         'post': post,
+        'author_posts': Post.objects.filter(author_id=post.author_id).count(),
         'comments': comments,
+        'next_threads': next_threads,
+        'reply_to': reply_to,
         'form': form
     }
+    if request.user.is_staff:
+        context['views_lag'] = round(view_counts.lag())
     return render(request, 'posts/post_detail.html', context)
 
 
@@ -66,6 +142,12 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        update_post_tags(post)
+        update_mentions(post, post.author, post)
+        notify_followers.enqueue(post.pk, key=f'notify_post:{post.pk}')
+        if post.image:
+            make_post_thumbnails.enqueue(
+                post.pk, key=f'thumbnails:{post.pk}:{post.image.name}')
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -81,7 +163,13 @@ def post_edit(request, post_id):
         instance=post,
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'text' in form.changed_data:
+            update_post_tags(post)
+            update_mentions(post, post.author, post)
+        if 'image' in form.changed_data and post.image:
+            make_post_thumbnails.enqueue(
+                post.pk, key=f'thumbnails:{post.pk}:{post.image.name}')
         return redirect('posts:post_detail', post.pk,)
     context = {
         'post': post,
@@ -99,31 +187,131 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = parse_id(request.POST.get('parent'))
+        if parent_id is not None:
+            comment.parent = post.comments.filter(pk=parent_id).first()
         comment.save()
+        notify_comment(comment)
+        update_mentions(comment, comment.author, post)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
     post_list = Post.objects.filter(
-        author__following__user=request.user)
-    context = {'page_obj': paginator(post_list, request)}
+        author__following__user=request.user
+    ).feed(comment_count=True, author=False)
+    page_obj = paginator(post_list, request)
+    attach_thumbnails(page_obj, *FOLLOW_THUMBNAIL)
+    attach_likes(page_obj, request.user)
+    attach_authors(page_obj)
+    attach_mentions(page_obj)
+    context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
 
+def newer_posts(post_list, after):
+    ids = list(post_list.filter(pk__gt=after).order_by('-pk').values_list(
+        'pk', flat=True)[:NEW_POSTS_LIMIT + 1])
+    return ids[:NEW_POSTS_LIMIT], len(ids) > NEW_POSTS_LIMIT
+
+
+def new_posts_response(request, post_list):
+    """Id постов новее курсора ``after``; ``wait`` — ждать до N секунд.
+
+    ``more`` значит, что новых постов больше NEW_POSTS_LIMIT. Без курсора
+    отвечает последним id, с которого клиенту начинать.
+    """
+    after = request.GET.get('after', '')
+    if not after:
+        last = post_list.order_by('-pk').values_list('pk', flat=True).first()
+        return JsonResponse(
+            {'ids': [], 'count': 0, 'more': False, 'cursor': last or 0})
+    after = parse_id(after)
+    if after is None:
+        return HttpResponse('Bad cursor', status=400)
+    ids, more = newer_posts(post_list, after)
+    try:
+        wait = min(float(request.GET.get('wait', 0)), LONG_POLL_TIMEOUT)
+    except ValueError:
+        wait = 0
+    if not ids and wait > 0 and new_posts.wait(after, wait):
+        # Все посты до seen уже в базе: если ни один не попал в ленту,
+        # курсор сдвигается за них, иначе ожидание сразу завершалось бы
+        seen = new_posts.last_id
+        ids, more = newer_posts(post_list, after)
+        after = max(after, seen)
+    return JsonResponse({
+        'ids': ids,
+        'count': len(ids),
+        'more': more,
+        'cursor': ids[0] if ids else after,
+    })
+
+
+def index_new(request):
+    return new_posts_response(request, Post.objects.all())
+
+
+@login_required
+def follow_new(request):
+    return new_posts_response(request, Post.objects.filter(
+        author__following__user=request.user))
+
+
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(
+    author_id = user_id_or_404(username)
+    if request.user.pk != author_id:
+        follow, created = Follow.objects.get_or_create(
             user=request.user,
-            author=author
+            author_id=author_id
         )
+        if created:
+            notify_follow(follow)
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
     Follow.objects.filter(
-        user=request.user, author__username=username).delete()
+        user=request.user, author_id=user_id_or_404(username)).delete()
     return redirect('posts:profile', username)
+
+
+@login_required
+def notifications(request):
+    before = request.GET.get('before')
+    if before:
+        before = parse_id(before)
+        if before is None:
+            return HttpResponse('Bad cursor', status=400)
+    page, next_cursor = inbox_page(request.user, before or None)
+    mark_read(request.user, page)
+    context = {
+        'notifications': page,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+def redirect_back(request, post_id):
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(next_url, {request.get_host()}):
+        return redirect(next_url)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+@require_POST
+def post_like(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    like(request.user, post_id)
+    return redirect_back(request, post_id)
+
+
+@login_required
+@require_POST
+def post_unlike(request, post_id):
+    unlike(request.user, post_id)
+    return redirect_back(request, post_id)
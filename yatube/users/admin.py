@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.admin import purge_action
+from posts.tasks import purge_users_task
+
+User = get_user_model()
+
+purge_selected_users = purge_action(
+    'users', purge_users_task, 'Удаление пользователей')
+
+
+class PurgeUserAdmin(UserAdmin):
+    actions = (purge_selected_users,)
+
+
+admin.site.unregister(User)
+admin.site.register(User, PurgeUserAdmin)
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -52,18 +53,30 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Отступы вырезаются из шаблонов при загрузке, вне DEBUG шаблоны кешируются
+TEMPLATE_LOADERS = [
+    'core.loaders.FilesystemLoader',
+    'core.loaders.AppDirectoriesLoader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+# Шаблоны приложений грузит core.loaders.AppDirectoriesLoader
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year'
+                'core.context_processors.year.year',
+                'core.context_processors.notifications.notifications',
             ],
         },
     },
@@ -121,6 +134,8 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 
 LOGIN_URL = 'users:login'
@@ -130,15 +145,36 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# True выполняет задачи очереди сразу при постановке, без run_workers
+TASKS_EAGER = False
+
+# Сколько SSE-потоков групп держит один процесс. Каждый занимает поток
+# сервера, поэтому лимит ставится под число потоков воркера, а тысячам
+# читателей нужен gevent или другой воркер с дешевыми соединениями
+POST_STREAM_MAX = 1000
+
+# Как часто буфер счетчиков постов пишется в базу; None — только вручную
+COUNTER_FLUSH_INTERVAL = 5
+
+# Тесты идут без фоновой записи счетчиков, см. core/testing.py
+TEST_RUNNER = 'core.testing.TestRunner'
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Адрес сайта для абсолютных ссылок в карте сайта
+SITE_URL = 'http://127.0.0.1:8000'
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
     }
 }
 
+# Хранилище sorl с чтением миниатюр страницы пачкой
+THUMBNAIL_KVSTORE = 'posts.thumbnails.KVStore'
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import static_serve
 
 
 handler404 = 'core.views.page_not_found'
@@ -16,6 +18,11 @@ urlpatterns = [
     path('about/', include('about.urls', namespace='about'))
 ]
 
+if not settings.DEBUG:
+    urlpatterns += (
+        re_path(r'^static/(?P<path>.*)$', static_serve, name='static'),
+    )
+
 if settings.DEBUG:
     import debug_toolbar
     